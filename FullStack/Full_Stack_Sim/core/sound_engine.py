@@ -2,6 +2,19 @@ import pygame
 import math
 import random
 import array
+import os
+import json
+import mmap
+import struct
+import hashlib
+import threading
+from collections import deque
+from settings import *
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 class SoundGenerator:
     def __init__(self, sample_rate=44100):
@@ -12,7 +25,41 @@ class SoundGenerator:
         return pygame.mixer.Sound(buffer=data)
 
     def generate_wave(self, freq, duration, wave_type='sine', volume=0.5):
+        return self._make_buffer(self.render_wave(freq, duration, wave_type, volume))
+
+    def render_wave(self, freq, duration, wave_type='sine', volume=0.5):
+        """Returns the raw 16-bit PCM samples without wrapping them in a Sound."""
         n_samples = int(self.sample_rate * duration)
+        if np is not None:
+            return self._synthesize_numpy(freq, n_samples, wave_type, volume)
+        return self._synthesize_python(freq, n_samples, wave_type, volume)
+
+    def _synthesize_numpy(self, freq, n_samples, wave_type, volume):
+        """Vectorized path: builds the whole waveform and envelope as arrays."""
+        i = np.arange(n_samples, dtype=np.float64)
+        t = i / self.sample_rate
+        if wave_type == 'sine':
+            val = np.sin(2.0 * np.pi * freq * t)
+        elif wave_type == 'square':
+            val = np.where(np.sin(2.0 * np.pi * freq * t) > 0, 1.0, -1.0)
+        elif wave_type == 'saw':
+            val = 2.0 * (t * freq - np.floor(t * freq + 0.5))
+        elif wave_type == 'noise':
+            val = np.random.uniform(-1, 1, n_samples)
+        else:
+            val = np.zeros(n_samples)
+
+        attack = int(n_samples * 0.1)
+        decay = int(n_samples * 0.8)
+        env = np.ones(n_samples)
+        if attack > 0:
+            env[:attack] = i[:attack] / attack
+        env[decay + 1:] = 1.0 - ((i[decay + 1:] - decay) / (n_samples - decay))
+
+        return (val * self.max_amp * volume * env).astype(np.int16)
+
+    def _synthesize_python(self, freq, n_samples, wave_type, volume):
+        """Fallback path used when NumPy is not installed."""
         buf = array.array('h', [0] * n_samples)
         attack = int(n_samples * 0.1)
         decay = int(n_samples * 0.8)
@@ -35,7 +82,72 @@ class SoundGenerator:
             elif i > decay: env = 1.0 - ((i - decay) / (n_samples - decay))
             
             buf[i] = int(val * self.max_amp * volume * env)
-        return self._make_buffer(buf)
+        return buf
+
+class SoundBankCache:
+    """
+    On-disk store for rendered PCM buffers.
+    The file is tagged with a format version and a hash of the sample rate and
+    every generate_wave parameter, so any change to the bank invalidates it.
+    """
+    MAGIC = b'FSSB'
+    VERSION = 1
+
+    def __init__(self, path, generator):
+        self.path = path
+        self.gen = generator
+
+    def _key(self, spec):
+        payload = json.dumps({
+            "version": self.VERSION,
+            "sample_rate": self.gen.sample_rate,
+            "max_amp": self.gen.max_amp,
+            "spec": spec
+        }, sort_keys=True)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def load(self, spec):
+        """Memory-maps the cache file and builds Sounds from it. Returns None on a miss."""
+        try:
+            with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm[:4] != self.MAGIC: return None
+                version, header_len = struct.unpack('<II', mm[4:12])
+                if version != self.VERSION: return None
+                header = json.loads(mm[12:12 + header_len].decode('utf-8'))
+                if header.get("key") != self._key(spec): return None
+                data_start = 12 + header_len
+                bank = {}
+                with memoryview(mm) as view:
+                    for name, (offset, length) in header["entries"].items():
+                        start = data_start + offset
+                        with view[start:start + length] as chunk:
+                            bank[name] = pygame.mixer.Sound(buffer=chunk)
+                return bank
+        except (OSError, ValueError, KeyError, struct.error):
+            return None
+
+    def save(self, spec, buffers):
+        """Writes the rendered buffers. Failures are ignored; the bank is simply rebuilt next launch."""
+        entries = {}
+        blobs = []
+        offset = 0
+        for name, buf in buffers.items():
+            data = buf.tobytes()
+            entries[name] = [offset, len(data)]
+            blobs.append(data)
+            offset += len(data)
+        header = json.dumps({"key": self._key(spec), "entries": entries}).encode('utf-8')
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(self.MAGIC)
+                f.write(struct.pack('<II', self.VERSION, len(header)))
+                f.write(header)
+                for data in blobs:
+                    f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
 
 class MusicSequencer:
     def __init__(self):
@@ -45,14 +157,16 @@ class MusicSequencer:
         
         # Sound Bank
         base_freqs = {'C': 130.81, 'C#': 138.59, 'D': 146.83, 'Eb': 155.56, 'E': 164.81, 'F': 174.61, 'F#': 185.00, 'G': 196.00, 'Ab': 207.65, 'A': 220.00, 'Bb': 233.08, 'B': 246.94}
-        self.sound_bank = {}
+        bank_spec = []
         for note, freq in base_freqs.items():
-            self.sound_bank[f"bass_{note}"] = self.gen.generate_wave(freq / 2, 0.4, 'square', 0.3)
-            self.sound_bank[f"pad_{note}"] = self.gen.generate_wave(freq, 1.0, 'sine', 0.15)
-            self.sound_bank[f"high_{note}"] = self.gen.generate_wave(freq * 2, 0.6, 'sine', 0.1)
-        self.sound_bank['kick'] = self.gen.generate_wave(60, 0.1, 'sine', 0.8)
-        self.sound_bank['hat'] = self.gen.generate_wave(0, 0.05, 'noise', 0.15)
-        self.sound_bank['glitch'] = self.gen.generate_wave(800, 0.05, 'saw', 0.05)
+            bank_spec.append([f"bass_{note}", freq / 2, 0.4, 'square', 0.3])
+            bank_spec.append([f"pad_{note}", freq, 1.0, 'sine', 0.15])
+            bank_spec.append([f"high_{note}", freq * 2, 0.6, 'sine', 0.1])
+        bank_spec.append(['kick', 60, 0.1, 'sine', 0.8])
+        bank_spec.append(['hat', 0, 0.05, 'noise', 0.15])
+        bank_spec.append(['glitch', 800, 0.05, 'saw', 0.05])
+        self.bank_spec = bank_spec
+        self.sound_bank = {}
 
         # Themes
         self.themes = {
@@ -63,13 +177,70 @@ class MusicSequencer:
         }
         self.active_theme = self.themes["MENU"]
         self.step_interval = 60000 / self.active_theme["bpm"] / 4
-        self.last_step_time = 0
+        self.next_step_time = 0
         self.current_step = 0
         self.total_steps = 16
+        # Composed steps waiting for their due time: (due_ms, note names)
+        self.step_queue = deque()
+
+        # Pre-mixed bar mode: one reserved channel streams whole bars
+        self.premix_bars = MUSIC_PREMIX_BARS
+        self.bar_channel = None
+        self._bar_tail = None
+        self._ready_bar = None
+        self._bar_job = None
+        self._raw_bank = {}
+
+        # Background warm-up: MENU notes first, other themes jump the queue on set_theme
+        self._bank_lock = threading.Lock()
+        self._wanted = []
+        self._request_theme_sounds(self.active_theme)
+        self._bank_thread = threading.Thread(target=self._warm_sound_bank, daemon=True)
+        self._bank_thread.start()
+
+    def _theme_sound_names(self, theme):
+        names = ['kick', 'hat', f"bass_{theme['scale'][0]}"]
+        for note in theme["scale"]:
+            names += [f"pad_{note}", f"high_{note}"]
+        names.append('glitch')
+        return names
+
+    def _request_theme_sounds(self, theme):
+        with self._bank_lock:
+            names = [n for n in self._theme_sound_names(theme) if n not in self.sound_bank]
+            self._wanted = names + [n for n in self._wanted if n not in names]
+
+    def _warm_sound_bank(self):
+        """Worker thread: fills sound_bank from the cache, or synthesizes it note by note."""
+        cache = SoundBankCache(SOUND_CACHE_PATH, self.gen)
+        bank = cache.load(self.bank_spec)
+        if bank is not None:
+            with self._bank_lock:
+                self.sound_bank.update(bank)
+                self._wanted = []
+            return
+        spec = {entry[0]: entry[1:] for entry in self.bank_spec}
+        buffers = {}
+        while True:
+            with self._bank_lock:
+                if self._wanted: name = self._wanted.pop(0)
+                else: name = next((n for n in spec if n not in buffers), None)
+            if name is None: break
+            if name in buffers: continue
+            buffers[name] = self.gen.render_wave(*spec[name])
+            sound = self.gen._make_buffer(buffers[name])
+            with self._bank_lock:
+                self.sound_bank[name] = sound
+        cache.save(self.bank_spec, buffers)
 
     def start(self):
         self.is_playing = True
-        self.last_step_time = pygame.time.get_ticks()
+        if self.premix_bars and self.bar_channel is None:
+            pygame.mixer.set_reserved(1)
+            self.bar_channel = pygame.mixer.Channel(0)
+        self.next_step_time = pygame.time.get_ticks()
+        self.step_queue.clear()
+        self._schedule_ahead()
 
     def set_theme(self, scene_name):
         if scene_name == "MENU": target = "MENU"
@@ -78,24 +249,100 @@ class MusicSequencer:
         else: target = "DATA"
         self.active_theme = self.themes[target]
         self.step_interval = 60000 / self.active_theme["bpm"] / 4
+        self._request_theme_sounds(self.active_theme)
+        # Recompose the pending steps in the new theme, keeping the first one's slot
+        if self.step_queue:
+            self.next_step_time = self.step_queue[0][0]
+            self.current_step = (self.current_step - len(self.step_queue)) % self.total_steps
+            self.step_queue.clear()
+            self._schedule_ahead()
+
+    def _schedule_ahead(self):
+        while len(self.step_queue) < MUSIC_LOOKAHEAD_STEPS:
+            self.step_queue.append((self.next_step_time, self._compose_step(self.current_step)))
+            self.next_step_time += self.step_interval
+            self.current_step = (self.current_step + 1) % self.total_steps
 
     def update(self):
         if not self.is_playing: return
+        if self.premix_bars:
+            self._update_bars()
+            return
         now = pygame.time.get_ticks()
-        if now - self.last_step_time >= self.step_interval:
-            self.last_step_time = now
-            self._play_step(self.current_step)
-            self.current_step = (self.current_step + 1) % self.total_steps
+        if now < self.step_queue[0][0]: return
+        while self.step_queue and self.step_queue[0][0] <= now:
+            due, names = self.step_queue.popleft()
+            # A late frame still plays its step; a long stall drops the backlog instead of bursting it
+            if now - due < self.step_interval:
+                for name in names: self._play(name)
+        if not self.step_queue and now - self.next_step_time >= self.step_interval:
+            self.next_step_time = now
+        self._schedule_ahead()
 
-    def _play_step(self, step):
-        theme = self.active_theme
+    def _play(self, name):
+        # Notes still being synthesized are skipped rather than waited on
+        sound = self.sound_bank.get(name)
+        if sound: sound.play()
+
+    def _compose_step(self, step, theme=None):
+        theme = theme or self.active_theme
         scale = theme["scale"]
+        names = []
         if theme["bass_pattern"][step]:
-            if random.random() > 0.5: self.sound_bank['kick'].play()
-            else: self.sound_bank[f"bass_{scale[0]}"].play()
-        if step % 4 == 0 or random.random() < 0.1: self.sound_bank['hat'].play()
+            if random.random() > 0.5: names.append('kick')
+            else: names.append(f"bass_{scale[0]}")
+        if step % 4 == 0 or random.random() < 0.1: names.append('hat')
         if random.random() < theme["prob_pad"]:
             note = random.choice(scale)
             prefix = "pad_" if random.random() > 0.4 else "high_"
-            self.sound_bank[f"{prefix}{note}"].play()
-        if random.random() < theme["prob_glitch"]: self.sound_bank['glitch'].play()
\ No newline at end of file
+            names.append(f"{prefix}{note}")
+        if random.random() < theme["prob_glitch"]: names.append('glitch')
+        return names
+
+    # Pre-mixed Bars
+    def _update_bars(self):
+        # Keep one bar queued behind the one playing; render the next when the slot frees up
+        if self.bar_channel.get_queue() is not None: return
+        if self._ready_bar is not None:
+            bar, self._bar_tail = self._ready_bar
+            self._ready_bar = None
+            if self.bar_channel.get_busy(): self.bar_channel.queue(bar)
+            else: self.bar_channel.play(bar)
+        elif self._bar_job is None or not self._bar_job.is_alive():
+            self._bar_job = threading.Thread(target=self._render_bar, args=(self.active_theme, self._bar_tail), daemon=True)
+            self._bar_job.start()
+
+    def _raw_samples(self, name):
+        if name not in self._raw_bank:
+            sound = self.sound_bank.get(name)
+            if sound is None: return None
+            raw = sound.get_raw()
+            self._raw_bank[name] = np.frombuffer(raw, dtype=np.int16) if np is not None else array.array('h', raw)
+        return self._raw_bank[name]
+
+    def _render_bar(self, theme, tail):
+        """Worker thread: mixes one 16-step bar (plus the previous bar's ringing tail) into a single Sound."""
+        freq, _, channels = pygame.mixer.get_init()
+        interval = 60000 / theme["bpm"] / 4
+        offset = lambda ms: int(round(ms * freq / 1000)) * channels
+        bar_len = offset(interval * self.total_steps)
+        hits = []
+        for step in range(self.total_steps):
+            for name in self._compose_step(step, theme):
+                samples = self._raw_samples(name)
+                if samples is not None: hits.append((offset(step * interval), samples))
+        total = max([bar_len, len(tail) if tail is not None else 0] + [start + len(smp) for start, smp in hits])
+
+        if np is not None:
+            mix = np.zeros(total, dtype=np.int32)
+            if tail is not None: mix[:len(tail)] += tail
+            for start, smp in hits: mix[start:start + len(smp)] += smp
+            bar = np.clip(mix[:bar_len], -32768, 32767).astype(np.int16)
+        else:
+            mix = array.array('i', bytes(4 * total))
+            if tail is not None:
+                for i, v in enumerate(tail): mix[i] += v
+            for start, smp in hits:
+                for i, v in enumerate(smp): mix[start + i] += v
+            bar = array.array('h', (max(-32768, min(32767, v)) for v in mix[:bar_len]))
+        self._ready_bar = (self.gen._make_buffer(bar), mix[bar_len:])
@@ -0,0 +1,51 @@
+"""
+Lazy binary tree traversals.
+Explicit-stack generators shared by the tree facilities; any node with `left`/`right`
+attributes works. Nothing recurses, so deep trees cannot hit the recursion limit, and
+callers can start consuming nodes before the walk is finished.
+"""
+
+def pre_order(root):
+    stack = [root] if root else []
+    while stack:
+        node = stack.pop()
+        yield node
+        if node.right: stack.append(node.right)
+        if node.left: stack.append(node.left)
+
+def in_order(root):
+    stack = []; node = root
+    while stack or node:
+        while node:
+            stack.append(node); node = node.left
+        node = stack.pop()
+        yield node
+        node = node.right
+
+def post_order(root):
+    # Each frame records whether its right side was entered; comparing against the last visited
+    # node breaks when both children are the same shared object
+    stack = []; node = root
+    while stack or node:
+        if node:
+            stack.append([node, False]); node = node.left
+            continue
+        frame = stack[-1]
+        if frame[0].right and not frame[1]:
+            frame[1] = True; node = frame[0].right
+        else:
+            yield stack.pop()[0]
+
+def unique_post_order(root):
+    """Post-order over a DAG: each distinct node once, after everything below it. Reversed, parents come first."""
+    seen = set(); stack = [(root, False)] if root else []
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            yield node
+            continue
+        if node in seen: continue
+        seen.add(node)
+        stack.append((node, True))
+        for child in (node.right, node.left):
+            if child and child not in seen: stack.append((child, False))
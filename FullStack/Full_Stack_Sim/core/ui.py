@@ -65,7 +65,7 @@ class LCDDisplay:
             elif event.key == pygame.K_RETURN:
                 return self.text
             else:
-                allowed_chars = ':-+*/^()'
+                allowed_chars = ':-+*/^(),.'
                 if event.unicode.isalnum() or event.unicode in allowed_chars:
                     self.text += event.unicode.upper()
         return None
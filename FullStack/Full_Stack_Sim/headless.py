@@ -0,0 +1,119 @@
+"""
+Headless Batch Runner.
+Drives facility scenes from scripted operation lists under SDL's dummy video
+and audio drivers: no window, no frame cap. Reports wall time, frames simulated
+and operations completed per scene.
+
+Usage: python headless.py [SCENE ...] [--repeat N] [--no-draw]
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import sys
+import time
+import argparse
+import pygame
+from settings import *
+
+from simulation.site_parking_stack import ParkingStackSimulation
+from simulation.site_parking_queue import ParkingQueueSimulation
+from simulation.site_conveyor_list import ConveyorSimulation
+from simulation.site_router_tree import RouterTreeSimulation
+from simulation.site_expression_tree import ExpressionTreeSimulation
+from simulation.site_sorting_floor import SortingSimulation
+from simulation.site_recursion_lab import RecursionSimulation
+from simulation.site_warehouse_array import ArraySimulation
+
+# Scripts: (action method, LCD input or None, *method args). Each leaves the scene as it found it,
+# so a script can be repeated for soak runs.
+ARRAY_SLOT_3 = (320, 480)
+SCRIPTS = {
+    "STACK": (ParkingStackSimulation, [
+        ("action_arrive", "ABC123"), ("action_arrive", "XYZ789"), ("action_arrive", "LMN456"),
+        ("action_depart", "ABC123"), ("action_depart", "LMN456"), ("action_depart", "XYZ789")]),
+    "QUEUE": (ParkingQueueSimulation, [
+        ("action_arrive", "ABC123"), ("action_arrive", "XYZ789"), ("action_arrive", "LMN456"), ("action_arrive", "QRS000"),
+        ("action_depart", "QRS000"), ("action_depart", "XYZ789"), ("action_depart", "ABC123"), ("action_depart", "LMN456")]),
+    "CONVEYOR": (ConveyorSimulation, [
+        ("action_append", "10"), ("action_append", "20"), ("action_append", "30"),
+        ("action_remove", "20"), ("action_remove", "10"), ("action_remove", "30")]),
+    "TREE": (RouterTreeSimulation, [
+        ("action_insert", "50"), ("action_insert", "30"), ("action_insert", "70"), ("action_insert", "40"),
+        ("action_insert", "5,80,60,20,90,45"), ("action_traverse", None, "IN"), ("action_traverse", None, "POST"), ("action_reset", None),
+        ("action_toggle_balance", None), ("action_insert", "10"), ("action_insert", "20"), ("action_insert", "30"),
+        ("action_insert", "40"), ("action_insert", "50"), ("action_insert", "60"), ("action_insert", "70"),
+        ("action_traverse", None, "PRE"), ("action_reset", None), ("action_toggle_balance", None)]),
+    "EXPR_TREE": (ExpressionTreeSimulation, [
+        ("action_gen_expr", "(A+B)*C-D"), ("action_traverse", None, "TLR"),
+        ("action_gen_expr", "-12.5*RATE+(QTY-3)"), ("action_traverse", None, "LRT"), ("action_evaluate", "RATE:2,QTY:5.5"),
+        ("action_toggle_share", None), ("action_gen_expr", "(A+B)*(A+B)-C"), ("action_traverse", None, "LTR"),
+        ("action_traverse", None, "LRT"), ("action_evaluate", "A:1,B:2,C:3"), ("action_toggle_share", None), ("action_gen_levels", "3"), ("action_traverse", None, "LRT"),
+        ("action_gen_levels", "20"), ("action_traverse", None, "TLR"), ("action_clear", None)]),
+    "SORTING": (SortingSimulation, [
+        ("action_load_containers", "12"), ("action_begin_sort", None, "bubble"), ("action_begin_sort", None, "quick")]),
+    "RECURSION": (RecursionSimulation, [
+        ("action_load", "3"), ("action_solve", None), ("action_reset", None)]),
+    "ARRAY": (ArraySimulation, [
+        ("handle_mouse_click", None, ARRAY_SLOT_3), ("action_write", "42"),
+        ("handle_mouse_click", None, ARRAY_SLOT_3), ("action_clear", None)]),
+}
+
+MAX_FRAMES_PER_OP = 20000
+
+def is_busy(scene):
+    """True while the scene is still animating the last operation."""
+    return (getattr(scene, "is_animating", False) or getattr(scene, "is_traversing", False)
+            or getattr(scene, "is_sorting", False) or getattr(scene, "game_state", "IDLE") == "ANIMATING")
+
+def run_scene(name, screen, repeat=1, draw=True):
+    scene_cls, script = SCRIPTS[name]
+    scene = scene_cls(screen)
+    frames = 0; completed = 0; stalled = 0; failed = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for action, text, *args in script:
+            if text is not None: scene.lcd.text = text
+            getattr(scene, action)(*args)
+            if scene.lcd.status_msg.startswith("ERR"):
+                print(f"  {name}: {action}({text or ''}) rejected: {scene.lcd.status_msg}")
+                failed += 1; continue
+            op_frames = 0
+            # Always tick at least once so instant operations still reach update/draw
+            while op_frames == 0 or (is_busy(scene) and op_frames < MAX_FRAMES_PER_OP):
+                scene.update()
+                if draw: scene.draw()
+                op_frames += 1
+            frames += op_frames
+            if is_busy(scene): stalled += 1
+            else: completed += 1
+    return {"scene": name, "wall": time.perf_counter() - start, "frames": frames, "ops": completed, "stalled": stalled, "failed": failed}
+
+def main():
+    parser = argparse.ArgumentParser(description="Run facility scenes headlessly from scripted operations.")
+    parser.add_argument("scenes", nargs="*", default=list(SCRIPTS), help="Scenes to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=1, help="Times to repeat each scene's script")
+    parser.add_argument("--no-draw", action="store_true", help="Skip draw() to time the simulation alone")
+    args = parser.parse_args()
+
+    unknown = [s for s in args.scenes if s not in SCRIPTS]
+    if unknown: parser.error(f"unknown scene(s): {', '.join(unknown)} (choose from {', '.join(SCRIPTS)})")
+
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+    print(f"{'SCENE':<10} {'WALL (s)':>9} {'FRAMES':>8} {'FPS':>9} {'OPS':>5} {'STALLED':>8} {'FAILED':>7}")
+    totals = {"wall": 0.0, "frames": 0, "ops": 0, "stalled": 0, "failed": 0}
+    for name in args.scenes:
+        result = run_scene(name, screen, args.repeat, not args.no_draw)
+        for key in totals: totals[key] += result[key]
+        fps = result["frames"] / result["wall"] if result["wall"] else 0
+        print(f"{name:<10} {result['wall']:>9.3f} {result['frames']:>8} {fps:>9.1f} {result['ops']:>5} {result['stalled']:>8} {result['failed']:>7}")
+    fps = totals["frames"] / totals["wall"] if totals["wall"] else 0
+    print(f"{'TOTAL':<10} {totals['wall']:>9.3f} {totals['frames']:>8} {fps:>9.1f} {totals['ops']:>5} {totals['stalled']:>8} {totals['failed']:>7}")
+
+    pygame.quit()
+    return 1 if totals["stalled"] or totals["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
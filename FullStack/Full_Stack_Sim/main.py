@@ -5,6 +5,7 @@ import random
 from settings import *
 from core.ui import Button
 from core.sound_engine import MusicSequencer
+from core.interpolation import RenderInterpolator
 from simulation.site_parking_stack import ParkingStackSimulation
 from simulation.site_parking_queue import ParkingQueueSimulation
 from simulation.site_conveyor_list import ConveyorSimulation
@@ -21,8 +22,12 @@ COLOR_MARKING = (200, 180, 50)
 COLOR_WALL_DARK = (40, 45, 50)
 COLOR_WALL_LIGHT = (60, 65, 70)
 COLOR_ROOF_BASE = (30, 35, 40)
+ANGLE_STEP = 5
 
 class AmbientVehicle:
+    # Rotated sprites shared by every vehicle, keyed by (type, quantized angle)
+    _render_cache = {}
+
     def __init__(self, path, v_type, lane_id):
         self.path = path
         self.lane_id = lane_id
@@ -98,25 +103,49 @@ class AmbientVehicle:
                 self.y += dir_y * self.speed
                 self.angle = -math.degrees(math.atan2(dy, dx))
 
+    def _get_rendered(self):
+        """Returns the rotated body, shadow and headlight beam for the current heading."""
+        key = (self.type, int(round(self.angle / ANGLE_STEP)) * ANGLE_STEP % 360)
+        cached = AmbientVehicle._render_cache.get(key)
+        if cached is None:
+            angle = key[1]
+            rotated_img = pygame.transform.rotate(self.original_surf, angle)
+            rotated_shadow = pygame.transform.rotate(self.shadow_surf, angle)
+            beam = None
+            if self.type == 'TRUCK':
+                beam = self._generate_beam(angle)
+            cached = (rotated_img, rotated_shadow, beam)
+            AmbientVehicle._render_cache[key] = cached
+        return cached
+
+    def _generate_beam(self, angle):
+        rad = math.radians(angle)
+        front_x = math.cos(rad) * (self.width/2)
+        front_y = -math.sin(rad) * (self.width/2)
+        beam_len = 60
+        points = [
+            (front_x, front_y),
+            (front_x + math.cos(rad - 0.3) * beam_len, front_y - math.sin(rad - 0.3) * beam_len),
+            (front_x + math.cos(rad + 0.3) * beam_len, front_y - math.sin(rad + 0.3) * beam_len)
+        ]
+        min_x = int(math.floor(min(p[0] for p in points)))
+        min_y = int(math.floor(min(p[1] for p in points)))
+        w = int(math.ceil(max(p[0] for p in points))) - min_x + 1
+        h = int(math.ceil(max(p[1] for p in points))) - min_y + 1
+        surf = pygame.Surface((w, h), pygame.SRCALPHA)
+        pygame.draw.polygon(surf, (255, 255, 200, 30), [(px - min_x, py - min_y) for px, py in points])
+        return surf, (min_x, min_y)
+
     def draw(self, screen):
-        rotated_img = pygame.transform.rotate(self.original_surf, self.angle)
-        rotated_shadow = pygame.transform.rotate(self.shadow_surf, self.angle)
+        rotated_img, rotated_shadow, beam = self._get_rendered()
         rect = rotated_img.get_rect(center=(self.x, self.y))
         shadow_rect = rotated_shadow.get_rect(center=(self.x + 5, self.y + 5))
         screen.blit(rotated_shadow, shadow_rect)
         screen.blit(rotated_img, rect)
         
-        if self.type == 'TRUCK':
-            rad = math.radians(self.angle)
-            front_x = self.x + math.cos(rad) * (self.width/2)
-            front_y = self.y - math.sin(rad) * (self.width/2)
-            beam_len = 60
-            p1 = (front_x, front_y)
-            p2 = (front_x + math.cos(rad - 0.3) * beam_len, front_y - math.sin(rad - 0.3) * beam_len)
-            p3 = (front_x + math.cos(rad + 0.3) * beam_len, front_y - math.sin(rad + 0.3) * beam_len)
-            gfx_surf = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
-            pygame.draw.polygon(gfx_surf, (255, 255, 200, 30), [p1, p2, p3])
-            screen.blit(gfx_surf, (0,0))
+        if beam:
+            beam_surf, (off_x, off_y) = beam
+            screen.blit(beam_surf, (self.x + off_x, self.y + off_y))
 
 class IndustrialLabel:
     def __init__(self, x, y, title, subtitle):
@@ -162,6 +191,9 @@ class IndustrialLabel:
             pygame.draw.circle(screen, (255, 255, 255), start, 2)
 
 class Facility:
+    # Hover glow sprites shared between facilities with the same accent colour
+    _glow_cache = {}
+
     def __init__(self, x, y, w, h, title, subtitle, type_id, callback):
         self.rect = pygame.Rect(x, y, w, h)
         self.base_y = y
@@ -182,6 +214,10 @@ class Facility:
         if type_id in ["TREE", "EXPR_TREE"]: self.accent_color = (0, 255, 100)
         if type_id in ["RECURSION", "ARRAY"]: self.accent_color = (255, 50, 50)
 
+        self.depth = 10
+        self.roof_rect = pygame.Rect(self.rect.left + self.depth, self.rect.top - self.depth, self.rect.width, self.rect.height)
+        self.static_surf, self.static_origin = self._generate_static_surface()
+
     def update(self):
         mouse_pos = pygame.mouse.get_pos()
         self.hovered = self.rect.collidepoint(mouse_pos)
@@ -193,65 +229,79 @@ class Facility:
             if self.hovered:
                 self.callback()
 
-    def draw(self, screen):
+    def _generate_static_surface(self):
+        """Pre-renders the shadow, pad and building shell, which never change."""
+        margin = 20
+        surf = pygame.Surface((self.rect.width + margin * 2, self.rect.height + margin * 2), pygame.SRCALPHA)
+        origin = (self.rect.left - margin, self.rect.top - margin)
+        rect = self.rect.move(-origin[0], -origin[1])
+
         # Shadow
         shadow_offset = 15
         shadow_points = [
-            self.rect.bottomleft,
-            (self.rect.left + shadow_offset, self.rect.bottom - shadow_offset),
-            (self.rect.right + shadow_offset, self.rect.bottom - shadow_offset),
-            (self.rect.right + shadow_offset, self.rect.top - shadow_offset),
-            self.rect.topright
+            rect.bottomleft,
+            (rect.left + shadow_offset, rect.bottom - shadow_offset),
+            (rect.right + shadow_offset, rect.bottom - shadow_offset),
+            (rect.right + shadow_offset, rect.top - shadow_offset),
+            rect.topright
         ]
-        shadow_surf = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        pygame.draw.polygon(shadow_surf, (0, 0, 0, 120), shadow_points)
-        screen.blit(shadow_surf, (0,0))
+        pygame.draw.polygon(surf, (0, 0, 0, 120), shadow_points)
 
         # Concrete Pad
-        pad_rect = self.rect.inflate(20, 20)
-        pygame.draw.rect(screen, COLOR_CONCRETE_LIGHT, pad_rect, border_radius=4)
-        pygame.draw.rect(screen, (20, 20, 20), pad_rect, 1, border_radius=4)
+        pad_rect = rect.inflate(20, 20)
+        pygame.draw.rect(surf, COLOR_CONCRETE_LIGHT, pad_rect, border_radius=4)
+        pygame.draw.rect(surf, (20, 20, 20), pad_rect, 1, border_radius=4)
 
         # 3D Building
-        depth = 10
+        depth = self.depth
         # Side Wall
-        pygame.draw.polygon(screen, (30, 30, 35), [
-            self.rect.topright,
-            (self.rect.right + depth, self.rect.top - depth),
-            (self.rect.right + depth, self.rect.bottom - depth),
-            self.rect.bottomright
+        pygame.draw.polygon(surf, (30, 30, 35), [
+            rect.topright,
+            (rect.right + depth, rect.top - depth),
+            (rect.right + depth, rect.bottom - depth),
+            rect.bottomright
         ])
         # Top Wall
-        pygame.draw.polygon(screen, (50, 50, 55), [
-            self.rect.topleft,
-            (self.rect.left + depth, self.rect.top - depth),
-            (self.rect.right + depth, self.rect.top - depth),
-            self.rect.topright
+        pygame.draw.polygon(surf, (50, 50, 55), [
+            rect.topleft,
+            (rect.left + depth, rect.top - depth),
+            (rect.right + depth, rect.top - depth),
+            rect.topright
         ])
         
         # Roof
-        roof_rect = pygame.Rect(self.rect.left + depth, self.rect.top - depth, self.rect.width, self.rect.height)
-        pygame.draw.rect(screen, self.roof_color, roof_rect)
+        roof_rect = pygame.Rect(rect.left + depth, rect.top - depth, rect.width, rect.height)
+        pygame.draw.rect(surf, self.roof_color, roof_rect)
         
         # Roof Details
         for i in range(roof_rect.left, roof_rect.right, 10):
-            pygame.draw.line(screen, (0, 0, 0, 50), (i, roof_rect.top), (i, roof_rect.bottom), 1)
-            
-        self._draw_mechanics(screen, roof_rect)
+            pygame.draw.line(surf, (0, 0, 0), (i, roof_rect.top), (i, roof_rect.bottom), 1)
+        return surf, origin
 
-        # Hover Glow
-        if self.hovered:
+    def _get_glow_surface(self):
+        glow = Facility._glow_cache.get(self.accent_color)
+        if glow is None:
             glow_radius = 150
-            glow_surf = pygame.Surface((glow_radius * 2, glow_radius * 2), pygame.SRCALPHA)
+            glow = pygame.Surface((glow_radius * 2, glow_radius * 2), pygame.SRCALPHA)
             num_layers = 15
             for i in range(num_layers):
                 radius = int(glow_radius * (1 - i/num_layers))
                 alpha = int(10 + (i * 2))
                 if alpha > 60: alpha = 60
-                pygame.draw.circle(glow_surf, (*self.accent_color, alpha), (glow_radius, glow_radius), radius)
-            screen.blit(glow_surf, (roof_rect.centerx - glow_radius, roof_rect.centery - glow_radius))
-            pygame.draw.rect(screen, self.accent_color, roof_rect, 2)
-            pygame.draw.rect(screen, (255, 255, 255), roof_rect, 1)
+                pygame.draw.circle(glow, (*self.accent_color, alpha), (glow_radius, glow_radius), radius)
+            Facility._glow_cache[self.accent_color] = glow
+        return glow
+
+    def draw(self, screen):
+        screen.blit(self.static_surf, self.static_origin)
+        self._draw_mechanics(screen, self.roof_rect)
+
+        # Hover Glow
+        if self.hovered:
+            glow_surf = self._get_glow_surface()
+            screen.blit(glow_surf, glow_surf.get_rect(center=self.roof_rect.center))
+            pygame.draw.rect(screen, self.accent_color, self.roof_rect, 2)
+            pygame.draw.rect(screen, (255, 255, 255), self.roof_rect, 1)
             
         self.label.draw(screen, self.hovered)
 
@@ -540,6 +590,10 @@ class MainMenu:
                 self.transition_alpha = 255
                 self.switch_callback(self.target_scene)
 
+    def interpolated_points(self):
+        # Vehicles are drawn from x/y rather than a sprite rect
+        return self.vehicles
+
     def draw(self):
         self.screen.blit(self.bg_surface, (0, 0))
         for v in self.vehicles:
@@ -592,6 +646,7 @@ def main():
     
     current_scene = None
     is_fullscreen = False
+    interpolator = RenderInterpolator()
 
     def toggle_fullscreen():
         nonlocal is_fullscreen, screen
@@ -605,6 +660,8 @@ def main():
 
     def switch_scene(scene_name):
         nonlocal current_scene
+        if scene_name != "QUIT": sequencer.set_theme(scene_name)
+        interpolator.forget()
         if scene_name == "MENU":
             current_scene = MainMenu(screen, switch_scene, toggle_fullscreen)
         elif scene_name in ["STACK", "QUEUE", "CONVEYOR", "TREE", "EXPR_TREE", "SORTING", "RECURSION", "ARRAY"]:
@@ -649,6 +706,11 @@ def main():
 
     switch_scene("MENU")
 
+    # Fixed-timestep simulation: updates run at SIM_TICK_RATE, rendering takes whatever is left and
+    # blends moving objects between the last two simulation steps
+    sim_step_ms = 1000 / SIM_TICK_RATE
+    accumulator = sim_step_ms
+
     running = True
     while running:
         for event in pygame.event.get():
@@ -664,12 +726,21 @@ def main():
 
         sequencer.update()
 
-        if current_scene:
+        steps = 0
+        # The tolerance absorbs clock.tick's whole-millisecond rounding (16/17 ms at 60 FPS), so each frame runs one step
+        while current_scene and accumulator >= sim_step_ms - SIM_STEP_TOLERANCE_MS and steps < MAX_SIM_STEPS_PER_FRAME:
+            interpolator.snapshot(current_scene)
             current_scene.update()
-            current_scene.draw()
+            accumulator -= sim_step_ms
+            steps += 1
+        # Leftover time carries into the next frame; only a capped-out backlog is dropped
+        if steps == MAX_SIM_STEPS_PER_FRAME: accumulator = min(accumulator, sim_step_ms)
+
+        if current_scene:
+            interpolator.draw(current_scene, min(1.0, max(0.0, accumulator / sim_step_ms)))
 
         pygame.display.flip()
-        clock.tick(FPS)
+        accumulator += clock.tick(FPS)
 
     pygame.quit()
     sys.exit()
@@ -9,9 +9,13 @@ import os
 # --- System Paths & Display ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ASSETS_DIR = os.path.join(BASE_DIR, 'assets')
+SOUND_CACHE_PATH = os.path.join(ASSETS_DIR, 'sound_bank.cache')
 SCREEN_WIDTH = 1000
 SCREEN_HEIGHT = 700
 FPS = 60
+SIM_TICK_RATE = 60          # Scene updates per second, independent of the render rate
+MAX_SIM_STEPS_PER_FRAME = 5 # Catch-up limit before a slow host starts dropping simulation time
+SIM_STEP_TOLERANCE_MS = 1   # Slack for millisecond-rounded frame times
 
 # --- Color Palette ---
 WHITE = (255, 255, 255)
@@ -119,4 +123,8 @@ CONCRETE_NOISE_2 = (120, 123, 127)
 WALL_BASE_COLOR = (130, 135, 140)
 WALL_LINE_COLOR = (120, 125, 130)
 LIGHT_RAY_COLOR = (255, 255, 220, 20)
-STATIC_SHADOW_COLOR = (0, 0, 0, 40)
\ No newline at end of file
+STATIC_SHADOW_COLOR = (0, 0, 0, 40)
+
+# --- Audio ---
+MUSIC_LOOKAHEAD_STEPS = 4
+MUSIC_PREMIX_BARS = False  # Mix each bar into one buffer on a worker thread
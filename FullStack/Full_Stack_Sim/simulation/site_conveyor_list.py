@@ -1,5 +1,6 @@
 import pygame
 import random
+import array
 from settings import *
 from core.sprites import CrateSprite
 from core.ui import HandheldChassis, LCDDisplay, RoundButton
@@ -53,35 +54,150 @@ class Node:
     def __init__(self, label): self.label = label; self.next = None
 
 class LinkedListManager:
-    def __init__(self, capacity=10): self.head = None; self.size = 0; self.capacity = capacity
+    """
+    Singly linked list with a tail pointer and a label index for O(1) append and duplicate checks.
+    With skip_index, nodes also carry express lanes (an indexable skip list), so positional
+    insert and remove-by-label cost O(log n) expected instead of a walk from head.
+    """
+    SKIP_MAX_LEVEL = 16
+
+    def __init__(self, capacity=10, skip_index=False):
+        self.head = None; self.tail = None; self.size = 0; self.capacity = capacity
+        self.labels = {}  # label -> node
+        self.skip_index = skip_index
+        if skip_index:
+            # Sentinel at position -1; lanes are [next, width], a None next means "past the tail"
+            self._root = Node(None); self._root.lanes = [[None, 1] for _ in range(self.SKIP_MAX_LEVEL - 1)]
     def is_full(self): return self.size >= self.capacity
     def insert_at(self, index, label):
         if self.is_full(): return {"type": "ERROR", "message": "CONVEYOR FULL"}
         if index < 0 or index > self.size: return {"type": "ERROR", "message": "INVALID INDEX"}
         new_node = Node(label)
-        if index == 0: new_node.next = self.head; self.head = new_node
+        if self.skip_index: self._skip_insert(index, new_node)
+        elif index == 0: new_node.next = self.head; self.head = new_node
+        elif index == self.size: self.tail.next = new_node
         else:
             current = self.head
             for _ in range(index - 1): current = current.next
             new_node.next = current.next; current.next = new_node
+        if new_node.next is None: self.tail = new_node
+        self.labels[label] = new_node
         self.size += 1; return {"type": "INSERT", "label": label, "index": index}
     def remove_box(self, label):
         if not self.head: return [{"type": "ERROR", "message": "CONVEYOR EMPTY"}]
-        if self.head.label == label:
-            self.head = self.head.next; self.size -= 1
-            return [{"type": "REMOVE", "label": label, "index": 0}]
-        current = self.head; index = 0
-        while current.next and current.next.label != label: current = current.next; index += 1
-        if current.next:
-            removed_node = current.next; current.next = removed_node.next; self.size -= 1
-            return [{"type": "REMOVE", "label": removed_node.label, "index": index + 1}]
-        return [{"type": "ERROR", "message": "NOT FOUND"}]
-    def find_box(self, label):
-        current = self.head
-        while current:
-            if current.label == label: return True
-            current = current.next
-        return False
+        node = self.labels.pop(label, None)
+        if node is None: return [{"type": "ERROR", "message": "NOT FOUND"}]
+        if self.skip_index:
+            index, prev = self._skip_remove(node)
+        elif self.head is node:
+            index, prev = 0, None; self.head = node.next
+        else:
+            prev = self.head; index = 1
+            while prev.next is not node: prev = prev.next; index += 1
+            prev.next = node.next
+        if self.tail is node: self.tail = prev
+        self.size -= 1
+        return [{"type": "REMOVE", "label": label, "index": index}]
+    def find_box(self, label): return label in self.labels
+
+    # Skip Index
+    def _skip_path(self, index):
+        """Last node before `index` on every level, with its position."""
+        update = [None] * self.SKIP_MAX_LEVEL; positions = [0] * self.SKIP_MAX_LEVEL
+        node = self._root; pos = -1
+        for level in range(self.SKIP_MAX_LEVEL - 1, 0, -1):
+            while True:
+                nxt, width = node.lanes[level - 1]
+                if nxt is None or pos + width >= index: break
+                node = nxt; pos += width
+            update[level] = node; positions[level] = pos
+        while pos + 1 < index: node = node.next; pos += 1
+        update[0] = node; positions[0] = pos
+        return update, positions
+    def _skip_rank(self, node):
+        # Climb the highest lane available until running off the tail; the distance gives the position
+        dist = 0
+        while node is not None:
+            node, width = node.lanes[-1] if node.lanes else (node.next, 1)
+            dist += width
+        return self.size - dist
+    def _skip_insert(self, index, node):
+        update, positions = self._skip_path(index)
+        height = 0
+        while height < self.SKIP_MAX_LEVEL - 1 and random.random() < 0.5: height += 1
+        node.lanes = []
+        node.next = update[0].next; update[0].next = node
+        for level in range(1, self.SKIP_MAX_LEVEL):
+            lane = update[level].lanes[level - 1]
+            if level <= height:
+                node.lanes.append([lane[0], positions[level] + lane[1] + 1 - index])
+                lane[0] = node; lane[1] = index - positions[level]
+            else: lane[1] += 1
+        self.head = self._root.next
+    def _skip_remove(self, node):
+        index = self._skip_rank(node)
+        update, _ = self._skip_path(index)
+        update[0].next = node.next
+        for level in range(1, self.SKIP_MAX_LEVEL):
+            lane = update[level].lanes[level - 1]
+            if lane[0] is node: lane[0] = node.lanes[level - 1][0]; lane[1] += node.lanes[level - 1][1] - 1
+            else: lane[1] -= 1
+        self.head = self._root.next
+        return index, (update[0] if update[0] is not self._root else None)
+
+class PooledLinkedListManager:
+    """
+    Same interface as LinkedListManager, but nodes live in parallel columns instead of objects:
+    an array of next-slot links and a list of labels, with freed slots threaded into a free list.
+    Suited to very long lists; `reserve` pre-sizes the pool so inserts don't allocate.
+    """
+    NIL = -1
+
+    def __init__(self, capacity=10, reserve=0):
+        self.head = self.NIL; self.tail = self.NIL; self.size = 0; self.capacity = capacity
+        self.labels = {}  # label -> slot
+        self.next = array.array('i', range(1, reserve + 1)); self.label = [None] * reserve
+        if reserve: self.next[-1] = self.NIL
+        self.free = 0 if reserve else self.NIL
+    def _alloc(self, label):
+        if self.free != self.NIL:
+            slot = self.free; self.free = self.next[slot]; self.next[slot] = self.NIL; self.label[slot] = label
+        else:
+            slot = len(self.label); self.next.append(self.NIL); self.label.append(label)
+        return slot
+    def _release(self, slot): self.label[slot] = None; self.next[slot] = self.free; self.free = slot
+    def is_full(self): return self.size >= self.capacity
+    def insert_at(self, index, label):
+        if self.is_full(): return {"type": "ERROR", "message": "CONVEYOR FULL"}
+        if index < 0 or index > self.size: return {"type": "ERROR", "message": "INVALID INDEX"}
+        slot = self._alloc(label); nxt = self.next
+        if index == 0: nxt[slot] = self.head; self.head = slot
+        elif index == self.size: nxt[self.tail] = slot
+        else:
+            current = self.head
+            for _ in range(index - 1): current = nxt[current]
+            nxt[slot] = nxt[current]; nxt[current] = slot
+        if nxt[slot] == self.NIL: self.tail = slot
+        self.labels[label] = slot
+        self.size += 1; return {"type": "INSERT", "label": label, "index": index}
+    def remove_box(self, label):
+        if self.head == self.NIL: return [{"type": "ERROR", "message": "CONVEYOR EMPTY"}]
+        slot = self.labels.pop(label, None)
+        if slot is None: return [{"type": "ERROR", "message": "NOT FOUND"}]
+        nxt = self.next
+        if self.head == slot:
+            index, prev = 0, self.NIL; self.head = nxt[slot]
+        else:
+            prev = self.head; index = 1
+            while nxt[prev] != slot: prev = nxt[prev]; index += 1
+            nxt[prev] = nxt[slot]
+        if self.tail == slot: self.tail = prev
+        self._release(slot); self.size -= 1
+        return [{"type": "REMOVE", "label": label, "index": index}]
+    def find_box(self, label): return label in self.labels
+    def __iter__(self):
+        slot = self.head
+        while slot != self.NIL: yield self.label[slot]; slot = self.next[slot]
 
 class ConveyorSimulation:
     def __init__(self, screen):
@@ -1,10 +1,48 @@
 import pygame
 import math
 import random
+import operator
+import itertools
 from settings import *
 from core.ui import HandheldChassis, LCDDisplay, RoundButton, Button
+from core import traversal
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # ... [Keep Node, ExpressionTreeManager, and DroneSprite classes unchanged] ...
+# Compiled program opcodes
+OP_PUSH, OP_LOAD, OP_APPLY, OP_NEGATE, OP_STORE, OP_RECALL = range(6)
+# Unary minus token and node label; the '-' keeps it out of the identifier namespace
+UNARY_MINUS = 'u-'
+
+def display_label(value):
+    # Internal tokens get a UI label; NEG rather than '-' keeps it apart from subtraction in a postfix manifest
+    return "NEG" if value == UNARY_MINUS else str(value)
+
+# Integer results stay exact while they fit the float range; anything larger overflows like a float would
+MAX_EXACT_BITS = 1024
+
+def _check_int(value):
+    if isinstance(value, int) and value.bit_length() > MAX_EXACT_BITS: raise OverflowError("integer result too large")
+    return value
+
+def _multiply(left, right):
+    return _check_int(left * right)
+
+def _power(base, exponent):
+    if isinstance(base, int) and isinstance(exponent, int):
+        if exponent < 0: return float(base) ** exponent
+        # Bound the result before computing it, so a huge power never stalls the frame building a big int
+        if abs(base) > 1 and (base.bit_length() - 1) * exponent > MAX_EXACT_BITS: raise OverflowError("integer result too large")
+        return _check_int(base ** exponent)
+    result = base ** exponent
+    # A negative base to a fractional power comes back complex; the column path gives nan for it instead
+    if isinstance(result, complex): raise ValueError("NOT A REAL NUMBER")
+    return result
+
 class Node:
     def __init__(self, value):
         self.value = value
@@ -12,61 +50,132 @@ class Node:
         self.right = None
         self.x = 0; self.y = 0
         self.target_x = 0; self.target_y = 0
+        self.dirty = True
+        self.collapsed = 0
+
+class ImplicitNode:
+    """A view of one level-tree node by index; its children are made on access from `children_of`."""
+    __slots__ = ("tree", "index")
+    def __init__(self, tree, index):
+        self.tree = tree; self.index = index
+    def _child(self, side):
+        children = self.tree.children_of(self.index)
+        return ImplicitNode(self.tree, children[side]) if children else None
+    @property
+    def left(self): return self._child(0)
+    @property
+    def right(self): return self._child(1)
+    @property
+    def value(self): return self.tree.label_at(self.index)
 
 class ExpressionTreeManager:
-    def __init__(self):
+    def __init__(self, share_subtrees=False):
         self.root = None
         self.current_depth = 0
-        self.precedence = {'+': 1, '-': 1, '*': 2, '/': 2, '^': 3}
-    def _is_operator(self, char):
-        return char in "+-*/^"
-    def _infix_to_postfix(self, expression):
+        self.node_count = 0
+        self.levels = 0; self.max_levels = 20; self.level_nodes = []
+        self.revision = 0
+        # Hash-consing: structurally identical subtrees are built once and shared, making the tree a DAG
+        self.share_subtrees = share_subtrees
+        # Unary minus binds tighter than * and / but looser than ^, so -A^2 is -(A^2)
+        self.precedence = {'+': 1, '-': 1, '*': 2, '/': 2, UNARY_MINUS: 3, '^': 4}
+        self.binary_ops = {'+': operator.add, '-': operator.sub, '*': _multiply, '/': operator.truediv, '^': _power}
+        self.program = None; self.program_revision = -1
+    def _is_operator(self, token):
+        return token in self.precedence
+    def _tokenize(self, expression):
+        """
+        Splits an infix string into numbers (with an optional decimal part), identifiers,
+        operators and parentheses in one pass. A '-' with no operand to its left becomes UNARY_MINUS;
+        a '+' in the same spot is dropped. Whitespace only separates tokens, so "3 4" stays two operands.
+        """
+        tokens = []; i = 0; n = len(expression)
+        while i < n:
+            char = expression[i]
+            if char.isspace():
+                i += 1; continue
+            if char.isdigit() or char == '.':
+                start = i; seen_point = False
+                while i < n and (expression[i].isdigit() or expression[i] == '.'):
+                    if expression[i] == '.':
+                        if seen_point: raise ValueError("malformed number")
+                        seen_point = True
+                    i += 1
+                if expression[start:i] == '.': raise ValueError("malformed number")
+                tokens.append(expression[start:i]); continue
+            if char.isalpha():
+                start = i
+                while i < n and expression[i].isalnum(): i += 1
+                tokens.append(expression[start:i]); continue
+            if char in "+-*/^()":
+                prefix = not tokens or tokens[-1] == '(' or self._is_operator(tokens[-1])
+                if char == '-' and prefix: tokens.append(UNARY_MINUS)
+                elif not (char == '+' and prefix): tokens.append(char)
+                i += 1; continue
+            raise ValueError(f"unexpected character {char!r}")
+        return tokens
+    def _infix_to_postfix(self, tokens):
         stack = []; output = []
-        for char in expression:
-            if char.isalnum():
-                output.append(char)
-            elif char == '(':
-                stack.append(char)
-            elif char == ')':
+        for token in tokens:
+            if token == '(':
+                stack.append(token)
+            elif token == ')':
                 while stack and stack[-1] != '(':
                     output.append(stack.pop())
-                if stack and stack[-1] == '(':
-                    stack.pop()
-            elif self._is_operator(char):
+                if not stack: raise ValueError("unbalanced parentheses")
+                stack.pop()
+            elif token == UNARY_MINUS:
+                # Prefix operators have no left operand to flush
+                stack.append(token)
+            elif self._is_operator(token):
                 while (stack and self._is_operator(stack[-1])):
                     p_stack = self.precedence.get(stack[-1], 0)
-                    p_char = self.precedence.get(char, 0)
-                    is_right_assoc = char == '^'
+                    p_char = self.precedence.get(token, 0)
+                    is_right_assoc = token == '^'
                     if (p_stack > p_char) or (p_stack == p_char and not is_right_assoc):
                         output.append(stack.pop())
                     else:
                         break
-                stack.append(char)
+                stack.append(token)
+            else:
+                output.append(token)
         while stack:
             output.append(stack.pop())
         return output
     def build_from_expression(self, expression):
-        expression = "".join(filter(lambda x: not x.isspace(), expression))
-        if not expression: return False
+        if not expression.strip(): return False
         try:
-            postfix = self._infix_to_postfix(expression)
-            stack = []
-            for char in postfix:
-                if char.isalnum():
-                    stack.append(Node(char))
-                elif self._is_operator(char):
+            postfix = self._infix_to_postfix(self._tokenize(expression))
+            stack = []; heights = {}
+            interned = {} if self.share_subtrees else None
+            for token in postfix:
+                if token == '(':
+                    return False
+                elif token == UNARY_MINUS:
+                    if not stack: return False
+                    stack.append(self._make_node(token, None, stack.pop(), interned, heights))
+                elif self._is_operator(token):
                     if len(stack) < 2: return False
-                    node = Node(char)
-                    node.right = stack.pop()
-                    node.left = stack.pop()
-                    stack.append(node)
+                    right = stack.pop(); left = stack.pop()
+                    stack.append(self._make_node(token, left, right, interned, heights))
+                else:
+                    stack.append(self._make_node(token, None, None, interned, heights))
             if len(stack) != 1: return False
             self.root = stack[0]
-            self.current_depth = 0
-            self._calculate_depth(self.root, 0)
+            self.current_depth = heights[id(self.root)] - 1
+            self.node_count = len(heights); self.levels = 0; self.level_nodes = []
+            self.revision += 1
             return True
         except (IndexError, Exception):
             return False
+    def _make_node(self, value, left, right, interned, heights):
+        # Children are already interned, so their identity is enough to key the parent
+        key = (value, id(left), id(right))
+        if interned is not None and key in interned: return interned[key]
+        node = Node(value); node.left = left; node.right = right
+        heights[id(node)] = 1 + max(heights.get(id(left), 0), heights.get(id(right), 0))
+        if interned is not None: interned[key] = node
+        return node
     def _get_label_from_index(self, n):
         label = ""
         if n < 0: return ""
@@ -76,44 +185,115 @@ class ExpressionTreeManager:
             if n < 0:
                 break
         return label
-    def build_from_levels(self, num_levels):
-        """Generates a perfect binary tree of a given depth."""
-        if not 1 <= num_levels <= 5: return False
-        node_index = 0
-        self.root = Node(self._get_label_from_index(node_index))
-        node_index += 1
-        queue = [self.root]
-        for level in range(num_levels - 1):
-            for _ in range(len(queue)):
-                current = queue.pop(0)
-                current.left = Node(self._get_label_from_index(node_index))
-                node_index += 1
-                queue.append(current.left)
-                current.right = Node(self._get_label_from_index(node_index))
-                node_index += 1
-                queue.append(current.right)
-        self.current_depth = num_levels - 1
+    def build_from_levels(self, num_levels, visible_levels=5):
+        """
+        Generates a perfect binary tree of a given depth. The tree is implicit: node i has children
+        2i+1 and 2i+2 and its label is derived from i on demand, so only the top `visible_levels`
+        become Nodes. Each node on that frontier records how many descendants it hides in `collapsed`.
+        """
+        if not 1 <= num_levels <= self.max_levels: return False
+        shown = min(num_levels, visible_levels)
+        nodes = [Node(self.label_at(i)) for i in range(2 ** shown - 1)]
+        for i in range(len(nodes) // 2):
+            nodes[i].left = nodes[2 * i + 1]; nodes[i].right = nodes[2 * i + 2]
+        hidden = 2 ** (num_levels - shown + 1) - 2
+        for node in nodes[len(nodes) // 2:]: node.collapsed = hidden
+        self.root = nodes[0]; self.level_nodes = nodes
+        self.levels = num_levels
+        self.current_depth = shown - 1
+        self.node_count = 2 ** num_levels - 1
+        self.revision += 1
         return True
-    def _calculate_depth(self, node, depth):
-        if node is None: return
-        self.current_depth = max(self.current_depth, depth)
-        self._calculate_depth(node.left, depth + 1)
-        self._calculate_depth(node.right, depth + 1)
+    def label_at(self, index): return self._get_label_from_index(index)
+    def children_of(self, index):
+        """Indices of an implicit level-tree node's children, or None past the bottom level."""
+        first = 2 * index + 1
+        return (first, first + 1) if first < self.node_count else None
+    def clear(self):
+        self.root = None
+        self.current_depth = 0
+        self.node_count = 0; self.levels = 0; self.level_nodes = []
+        self.revision += 1
+    # Evaluation
+    def compile(self):
+        """
+        Flattens the tree into a postfix program of (opcode, operand) pairs, built once per tree.
+        PUSH and LOAD put a constant or a bound variable on the stack; APPLY folds the top two
+        values with a binary operator and NEGATE flips the top one. A node shared by several
+        parents (hash-consed builds) is computed once, STOREd, and RECALLed by the others.
+        """
+        if self.program_revision == self.revision: return self.program
+        if self.root is None: raise ValueError("EMPTY TREE")
+        parents = {}; stack = [self.root]
+        while stack:
+            node = stack.pop()
+            parents[id(node)] = parents.get(id(node), 0) + 1
+            if parents[id(node)] == 1: stack.extend(child for child in (node.left, node.right) if child)
+        program = []; slots = {}; stack = [(self.root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in slots: program.append((OP_RECALL, slots[id(node)])); continue
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in (node.right, node.left) if child)
+                continue
+            if node.value == UNARY_MINUS: program.append((OP_NEGATE, None))
+            elif node.left is not None or node.right is not None:
+                if node.value not in self.binary_ops: raise ValueError("NOT A FORMULA")
+                program.append((OP_APPLY, self.binary_ops[node.value]))
+            elif node.value[0].isalpha(): program.append((OP_LOAD, node.value))
+            else: program.append((OP_PUSH, float(node.value) if '.' in node.value else int(node.value)))
+            if parents[id(node)] > 1:
+                slots[id(node)] = len(slots); program.append((OP_STORE, slots[id(node)]))
+        self.program = program; self.program_revision = self.revision
+        return program
+    def _run(self, program, bindings):
+        stack = []; push = stack.append; pop = stack.pop; memo = {}
+        for opcode, operand in program:
+            if opcode == OP_PUSH: push(operand)
+            elif opcode == OP_LOAD:
+                if operand not in bindings: raise ValueError(f"UNBOUND {operand}")
+                push(bindings[operand])
+            elif opcode == OP_APPLY:
+                right = pop(); stack[-1] = operand(stack[-1], right)
+            elif opcode == OP_NEGATE: stack[-1] = -stack[-1]
+            elif opcode == OP_STORE: memo[operand] = stack[-1]
+            else: push(memo[operand])
+        return stack[0]
+    def evaluate(self, bindings=None):
+        """Evaluates the compiled tree against a {name: value} mapping."""
+        return self._run(self.compile(), bindings or {})
+    def evaluate_batch(self, rows):
+        """Evaluates the compiled tree once per binding mapping in `rows`, compiling only once."""
+        program = self.compile()
+        return [self._run(program, row) for row in rows]
+    def evaluate_columns(self, columns):
+        """
+        Vectorized batch: binds each variable to a whole column of values and runs the compiled
+        program once, so every operator node is a single elementwise NumPy pass over all rows.
+        Returns a float64 array with one result per row. Requires NumPy.
+        """
+        if np is None: raise RuntimeError("NUMPY NOT INSTALLED")
+        # Constants become float64 too, so constant-only subtrees such as 1/0 follow NumPy's inf/nan rules
+        program = [(OP_PUSH, np.float64(operand)) if opcode == OP_PUSH else (opcode, operand) for opcode, operand in self.compile()]
+        arrays = {name: np.asarray(values, dtype=np.float64).ravel() for name, values in columns.items()}
+        lengths = {len(values) for values in arrays.values()}
+        if len(lengths) > 1: raise ValueError("COLUMN LENGTHS DIFFER")
+        # One bad row (x/0, overflow) yields inf/nan in that row instead of failing the whole batch
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            result = self._run(program, arrays)
+        if np.ndim(result) == 0: return np.full(lengths.pop() if lengths else 1, result, dtype=np.float64)
+        return result
+    def iter_traversal(self, order_type, drawn_only=False):
+        """
+        Walks the logical tree: a level tree goes through its whole index space, hidden levels included.
+        With `drawn_only` it walks just the Node tree on screen, which visits those nodes in the same
+        relative order, since the drawn part of a level tree is its top levels.
+        """
+        walk = {"TLR": traversal.pre_order, "LTR": traversal.in_order, "LRT": traversal.post_order}[order_type]
+        return walk(ImplicitNode(self, 0) if self.levels and not drawn_only else self.root)
     def get_traversals(self):
-        return {
-            "TLR": self._get_pre_order(self.root),
-            "LTR": self._get_in_order(self.root),
-            "LRT": self._get_post_order(self.root)
-        }
-    def _get_pre_order(self, node):
-        if not node: return []
-        return [node] + self._get_pre_order(node.left) + self._get_pre_order(node.right)
-    def _get_in_order(self, node):
-        if not node: return []
-        return self._get_in_order(node.left) + [node] + self._get_in_order(node.right)
-    def _get_post_order(self, node):
-        if not node: return []
-        return self._get_post_order(node.left) + self._get_post_order(node.right) + [node]
+        return {order_type: list(self.iter_traversal(order_type)) for order_type in ("TLR", "LTR", "LRT")}
 
 class DroneSprite(pygame.sprite.Sprite):
     def __init__(self, x, y):
@@ -198,14 +378,20 @@ class ExpressionTreeSimulation:
         self.btn_gen_expr = RoundButton(btn_cx + btn_radius + h_gap, gen_y, btn_radius, BTN_ALT_GREEN_BASE, BTN_ALT_GREEN_LIGHT, "EXPR", self.action_gen_expr)
         self.btn_analyze = RoundButton(btn_cx, 390, 40, BTN_BLUE_BASE, BTN_BLUE_LIGHT, "TRAVERSE", self.action_open_analysis_menu)
         self.btn_clear = RoundButton(btn_cx, 490, 40, BTN_RED_BASE, BTN_RED_LIGHT, "CLEAR", self.action_clear)
+        self.btn_share = Button(btn_cx - 85, self.chassis.rect.bottom - 60, 170, 30, "SHARE SUBTREES: OFF", self.action_toggle_share)
         self.SIM_WIDTH = 750; self.TOP_MARGIN = 120; self.BOTTOM_MARGIN = 50
+        self.layout_key = None; self.VISIBLE_LEVELS = 5
+        self.node_order = []; self.node_order_revision = -1
+        self.font_badge = pygame.font.SysFont("Arial", 11, bold=True)
         self.ROOT_X = self.SIM_WIDTH // 2; self.current_node_size = 80; self.belt_offset = 0
         self.show_analysis_menu = False; self.manifest_data = None; self.pending_report_data = None
         menu_btn_w, menu_btn_h = 200, 40; menu_cx = self.SIM_WIDTH // 2; menu_start_y = 250
         self.menu_btn_tlr = Button(menu_cx - menu_btn_w//2, menu_start_y, menu_btn_w, menu_btn_h, "TLR (Pre-Order)", lambda: self.action_traverse("TLR"))
         self.menu_btn_ltr = Button(menu_cx - menu_btn_w//2, menu_start_y + 50, menu_btn_w, menu_btn_h, "LTR (In-Order)", lambda: self.action_traverse("LTR"))
         self.menu_btn_lrt = Button(menu_cx - menu_btn_w//2, menu_start_y + 100, menu_btn_w, menu_btn_h, "LRT (Post-Order)", lambda: self.action_traverse("LRT"))
-        self.is_traversing = False; self.traversal_path = []; self.traversal_index = 0
+        self.menu_btn_eval = Button(menu_cx - menu_btn_w//2, menu_start_y + 150, menu_btn_w, menu_btn_h, "EVALUATE (A:1,B:2)", self.action_evaluate)
+        self.is_traversing = False; self.traversal_path = []; self.traversal_index = 0; self.traversal_steps = None
+        self.traversal_labels = []; self.MANIFEST_TERMS = 40
         self.highlighted_node = None; self.highlight_timer = 0
         self.drone = DroneSprite(-50, -50); self.all_sprites.add(self.drone)
         self.bg_surface = self._generate_background()
@@ -290,23 +476,62 @@ class ExpressionTreeSimulation:
         # Deprecated
         pass
 
-    def _recalculate_layout(self, node, x, y, level, width_spread):
-        if node is None: return
-        node.target_x = x; node.target_y = y
+    def _refresh_layout(self):
+        """Re-targets the tree only when its shape or the floor size changed since the last layout."""
+        key = (self.logic.revision, self.logic.current_depth, self.SIM_WIDTH, SCREEN_HEIGHT)
+        if key == self.layout_key: return
+        self.layout_key = key
+        self._recalculate_layout()
+
+    def _nodes(self):
+        # Distinct nodes, parents before children; a node shared by several parents appears once
+        if self.node_order_revision != self.logic.revision:
+            self.node_order = list(traversal.unique_post_order(self.logic.root))[::-1]
+            self.node_order_revision = self.logic.revision
+        return self.node_order
+
+    def _recalculate_layout(self):
+        """
+        Targets every distinct node once, parents first. A node sits one layer below its deepest
+        parent, at the mean of the slots its parents offer it: in a plain tree that is the usual
+        halving spread, and a shared DAG node gets a single position between its parents.
+        """
+        nodes = self._nodes()
+        if not nodes: return
         depth = self.logic.current_depth
         level_height = (SCREEN_HEIGHT - self.TOP_MARGIN - self.BOTTOM_MARGIN) / max(1, depth) if depth > 0 else 0
-        next_spread = width_spread / 2
-        self._recalculate_layout(node.left, x - next_spread, y + level_height, level + 1, next_spread)
-        self._recalculate_layout(node.right, x + next_spread, y + level_height, level + 1, next_spread)
+        layer = {nodes[0]: 0}; slots = {nodes[0]: [self.ROOT_X]}
+        for node in nodes:
+            x = sum(slots[node]) / len(slots[node]); y = self.TOP_MARGIN + layer[node] * level_height
+            if node.target_x != x or node.target_y != y:
+                node.target_x = x; node.target_y = y; node.dirty = True
+            spread = self.SIM_WIDTH / 2 ** (layer[node] + 2)
+            for child, side in ((node.left, -1), (node.right, 1)):
+                if child is None: continue
+                layer[child] = max(layer.get(child, 0), layer[node] + 1)
+                slots.setdefault(child, []).append(x + side * spread)
+        # Children before parents, so each flag covers everything below its node
+        for node in reversed(nodes):
+            node.dirty = node.dirty or any(child.dirty for child in (node.left, node.right) if child)
 
-    def _update_node_positions(self, node):
-        if node is None: return
+    def _update_node_positions(self, node, seen=None):
+        # Settled subtrees are skipped outright, shared nodes are moved once; returns whether the subtree is still moving
+        if node is None or not node.dirty: return False
+        if seen is None: seen = set()
+        if node in seen: return node.dirty
+        seen.add(node)
         dx = node.target_x - node.x; dy = node.target_y - node.y
-        if abs(dx) > 0.1 or abs(dy) > 0.1:
+        moving = abs(dx) > 0.1 or abs(dy) > 0.1
+        if moving:
             node.x += dx * 0.1; node.y += dy * 0.1
         else:
             node.x, node.y = node.target_x, node.target_y
-        self._update_node_positions(node.left); self._update_node_positions(node.right)
+        left_dirty = self._update_node_positions(node.left, seen); right_dirty = self._update_node_positions(node.right, seen)
+        node.dirty = moving or left_dirty or right_dirty
+        return node.dirty
+
+    def interpolated_points(self):
+        return self._nodes()
 
     def draw_conveyor_line(self, start, end):
         dist = math.hypot(end[0]-start[0], end[1]-start[1])
@@ -327,41 +552,66 @@ class ExpressionTreeSimulation:
         pygame.draw.line(self.screen, (90,95,100), points[0], points[3], 5)
         pygame.draw.line(self.screen, (90,95,100), points[1], points[2], 5)
 
-    def draw_tree(self, node):
-        if node is None: return
-        if node.left:
-            self.draw_conveyor_line((node.x, node.y), (node.left.x, node.left.y)); self.draw_tree(node.left)
-        if node.right:
-            self.draw_conveyor_line((node.x, node.y), (node.right.x, node.right.y)); self.draw_tree(node.right)
+    def draw_tree(self):
+        # One pass per distinct node: every parent edge gets its belt, then every node its box on top
+        nodes = self._nodes()
+        for node in nodes:
+            for child in (node.left, node.right):
+                if child: self.draw_conveyor_line((node.x, node.y), (child.x, child.y))
+        for node in nodes: self._draw_node(node)
+
+    def _draw_node(self, node):
         s = int(self.current_node_size); rect = pygame.Rect(0, 0, s, s); rect.center = (node.x, node.y)
         pygame.draw.rect(self.screen, (30,30,35), rect.move(3,3), border_radius=5)
         pygame.draw.rect(self.screen, (80,85,90), rect, border_radius=5)
-        is_op = not node.value.isalnum()
+        is_op = node.left is not None or node.right is not None or node.collapsed > 0
         screen_color = (255, 200, 0) if is_op else (150,155,160)
         pygame.draw.rect(self.screen, screen_color, rect.inflate(-10, -10), border_radius=3)
         if self.highlighted_node == node and self.highlight_timer > 0:
             pygame.draw.rect(self.screen, (50, 255, 200), rect, 3, border_radius=5)
-        font_size = max(14, int(s * 0.5)); font = pygame.font.SysFont("Impact", font_size)
-        txt = font.render(str(node.value), True, (20, 20, 20))
+        # Long operands (multi-digit numbers, identifiers) shrink to stay inside the node
+        label = display_label(node.value)
+        font_size = max(10, int(s * 0.5 * min(1, 3 / len(label)))); font = pygame.font.SysFont("Impact", font_size)
+        txt = font.render(label, True, (20, 20, 20))
         self.screen.blit(txt, (rect.centerx - txt.get_width()//2, rect.centery - txt.get_height()//2))
+        if node.collapsed: self._draw_collapsed_badge(rect, node.collapsed)
+
+    def _draw_collapsed_badge(self, rect, count):
+        # Level of detail: levels below the frontier are summarized as a tag under the node
+        label = f"+{count / 1e6:.1f}M" if count >= 10 ** 6 else f"+{count / 1e3:.1f}K" if count >= 10 ** 4 else f"+{count}"
+        txt = self.font_badge.render(label, True, (255, 200, 0))
+        badge = pygame.Rect(0, 0, txt.get_width() + 8, txt.get_height() + 2); badge.midtop = (rect.centerx, rect.bottom + 4)
+        pygame.draw.rect(self.screen, (20, 20, 25), badge, border_radius=3)
+        pygame.draw.rect(self.screen, (255, 200, 0), badge, 1, border_radius=3)
+        self.screen.blit(txt, (badge.x + 4, badge.y + 1))
 
     def action_gen_levels(self):
         text = self.lcd.text
-        if not text.isdigit() or not (1 <= int(text) <= 5):
-            self.lcd.update_status("ERR: LVL 1-5 ONLY"); return
-        if self.logic.build_from_levels(int(text)):
-            self.manifest_data = None; self.lcd.update_status("TREE GENERATED"); self.lcd.text = ""
+        if not text.isdigit() or not (1 <= int(text) <= self.logic.max_levels):
+            self.lcd.update_status(f"ERR: LVL 1-{self.logic.max_levels} ONLY"); return
+        if self.logic.build_from_levels(int(text), self.VISIBLE_LEVELS):
+            self.manifest_data = None; self.lcd.text = ""
+            if self.logic.levels > self.VISIBLE_LEVELS: self.lcd.update_status(f"{self.logic.node_count} NODES, TOP {self.VISIBLE_LEVELS} SHOWN")
+            else: self.lcd.update_status("TREE GENERATED")
 
     def action_gen_expr(self):
         text = self.lcd.text.upper()
         if not text: self.lcd.update_status("ERR: NO INPUT"); return
         if self.logic.build_from_expression(text):
-            self.manifest_data = None; self.lcd.update_status("EXPR PARSED"); self.lcd.text = ""
+            self.manifest_data = None; self.lcd.text = ""
+            self.lcd.update_status(f"DAG PARSED: {self.logic.node_count} NODES" if self.logic.share_subtrees else "EXPR PARSED")
         else:
             self.lcd.update_status("ERR: INVALID EXPR")
 
+    def action_toggle_share(self):
+        # Applies to the next EXPR build; the current tree is left as it is
+        if self.is_traversing: return
+        self.logic.share_subtrees = not self.logic.share_subtrees
+        self.btn_share.text = f"SHARE SUBTREES: {'ON' if self.logic.share_subtrees else 'OFF'}"
+        self.lcd.update_status("DAG MODE ON" if self.logic.share_subtrees else "DAG MODE OFF")
+
     def action_clear(self):
-        self.logic.root = None; self.manifest_data = None
+        self.logic.clear(); self.manifest_data = None
         self.lcd.update_status("SYSTEM CLEARED"); self.lcd.text = ""
 
     def action_open_analysis_menu(self):
@@ -370,20 +620,53 @@ class ExpressionTreeSimulation:
 
     def action_traverse(self, order_type):
         self.show_analysis_menu = False
-        all_traversals = self.logic.get_traversals()
-        self.traversal_path = all_traversals[order_type]
+        # Nodes are pulled from the walk one drone flight at a time; the path fills in as we go
+        # The drone flies the drawn nodes; the manifest lists the logical walk, only as far as it has room for
+        self.traversal_steps = self.logic.iter_traversal(order_type, drawn_only=True); self.traversal_path = []
+        self.traversal_labels = [node.value for node in itertools.islice(self.logic.iter_traversal(order_type), self.MANIFEST_TERMS)]
         self.pending_report_data = {
-            "title": f"{order_type} (Post-Order)" if order_type == "LRT" else f"{order_type} (Pre-Order)" if order_type == "TLR" else f"{order_type} (In-Order)",
-            "path": " ".join([node.value for node in self.traversal_path])
+            "title": f"{order_type} (Post-Order)" if order_type == "LRT" else f"{order_type} (Pre-Order)" if order_type == "TLR" else f"{order_type} (In-Order)"
         }
         self.is_traversing = True; self.traversal_index = 0
         self.drone.pos_x, self.drone.pos_y = self.ROOT_X, 20
         self.lcd.update_status("ANALYZING..."); self.process_next_traversal_step()
 
+    def action_evaluate(self):
+        # Bindings come from the LCD as NAME:VALUE pairs separated by commas
+        self.show_analysis_menu = False
+        bindings = {}
+        for pair in filter(None, self.lcd.text.split(',')):
+            name, _, value = pair.partition(':')
+            try:
+                if not name[:1].isalpha(): raise ValueError
+                bindings[name] = float(value) if '.' in value else int(value)
+            except ValueError:
+                self.lcd.update_status("ERR: USE A:1,B:2"); return
+        try:
+            result = self.logic.evaluate(bindings)
+        except ZeroDivisionError:
+            self.lcd.update_status("ERR: DIV BY ZERO"); return
+        except OverflowError:
+            self.lcd.update_status("ERR: OVERFLOW"); return
+        except ValueError as e:
+            self.lcd.update_status(f"ERR: {e}"); return
+        shown = self._format_result(result)
+        terms = [f"{name}={value}" for name, value in bindings.items()]
+        self.manifest_data = {"title": "EVALUATION", "path": " ".join(terms + ["=>", shown])}
+        self.lcd.update_status("EVALUATED"); self.lcd.text = ""
+
+    def _format_result(self, result):
+        # Long integers are cut to scientific form by digit count; float() could overflow on them
+        if isinstance(result, float): return f"{result:.6g}"
+        digits = str(abs(result))
+        if len(digits) <= 12: return str(result)
+        return f"{'-' if result < 0 else ''}{digits[0]}.{digits[1:6]}E+{len(digits) - 1}"
+
     def process_next_traversal_step(self):
-        if self.traversal_index >= len(self.traversal_path):
+        node_to_visit = next(self.traversal_steps, None)
+        if node_to_visit is None:
             self.on_traversal_complete(); return
-        node_to_visit = self.traversal_path[self.traversal_index]
+        self.traversal_path.append(node_to_visit)
         self.drone.move_to((node_to_visit.x, node_to_visit.y), callback=self.on_drone_arrival)
 
     def on_drone_arrival(self):
@@ -392,14 +675,18 @@ class ExpressionTreeSimulation:
         self.traversal_index += 1; self.process_next_traversal_step()
 
     def on_traversal_complete(self):
-        self.is_traversing = False; self.traversal_path = []; self.traversal_index = 0
+        # A level tree's walk covers every node; otherwise it is as long as the drone's (shared DAG nodes repeat)
+        hidden = (self.logic.node_count if self.logic.levels else self.traversal_index) - len(self.traversal_labels)
+        self.pending_report_data["path"] = " ".join([display_label(label) for label in self.traversal_labels] + ([f"... +{hidden} MORE"] if hidden else []))
+        self.is_traversing = False; self.traversal_path = []; self.traversal_index = 0; self.traversal_steps = None
+        self.traversal_labels = []
         self.drone.move_to((-50, -50)); self.lcd.update_status("ANALYSIS DONE")
         self.manifest_data = self.pending_report_data; self.pending_report_data = None
 
     def handle_events(self, event):
         if self.show_analysis_menu:
-            self.menu_btn_tlr.handle_event(event); self.menu_btn_ltr.handle_event(event); self.menu_btn_lrt.handle_event(event)
-            if event.type == pygame.MOUSEBUTTONDOWN and not (self.menu_btn_tlr.is_hovered or self.menu_btn_ltr.is_hovered or self.menu_btn_lrt.is_hovered):
+            self.menu_btn_tlr.handle_event(event); self.menu_btn_ltr.handle_event(event); self.menu_btn_lrt.handle_event(event); self.menu_btn_eval.handle_event(event)
+            if event.type == pygame.MOUSEBUTTONDOWN and not (self.menu_btn_tlr.is_hovered or self.menu_btn_ltr.is_hovered or self.menu_btn_lrt.is_hovered or self.menu_btn_eval.is_hovered):
                 self.show_analysis_menu = False
             return
         if self.manifest_data and not self.is_traversing:
@@ -407,7 +694,7 @@ class ExpressionTreeSimulation:
                 self.manifest_data = None; self.lcd.update_status("READY")
             return
         self.lcd.handle_event(event); self.btn_gen_levels.handle_event(event)
-        self.btn_gen_expr.handle_event(event); self.btn_analyze.handle_event(event); self.btn_clear.handle_event(event)
+        self.btn_gen_expr.handle_event(event); self.btn_analyze.handle_event(event); self.btn_clear.handle_event(event); self.btn_share.handle_event(event)
 
     def update(self):
         if self.show_analysis_menu: return
@@ -424,7 +711,7 @@ class ExpressionTreeSimulation:
             size_diff = target_node_size - self.current_node_size
             if abs(size_diff) > 0.1: self.current_node_size += size_diff * 0.1
             else: self.current_node_size = target_node_size
-            self._recalculate_layout(self.logic.root, self.ROOT_X, self.TOP_MARGIN, 0, self.SIM_WIDTH / 2)
+            self._refresh_layout()
             self._update_node_positions(self.logic.root)
             self.drone.resize(self.current_node_size * 0.8)
         self.all_sprites.update(); self.lcd.update()
@@ -435,7 +722,7 @@ class ExpressionTreeSimulation:
         font_title = pygame.font.SysFont("Impact", 30)
         title_surf = font_title.render("SELECT ANALYSIS METHOD", True, WHITE)
         self.screen.blit(title_surf, (self.SIM_WIDTH//2 - title_surf.get_width()//2, 180))
-        self.menu_btn_tlr.draw(self.screen); self.menu_btn_ltr.draw(self.screen); self.menu_btn_lrt.draw(self.screen)
+        self.menu_btn_tlr.draw(self.screen); self.menu_btn_ltr.draw(self.screen); self.menu_btn_lrt.draw(self.screen); self.menu_btn_eval.draw(self.screen)
 
     def draw_manifest(self):
         overlay = pygame.Surface((self.SIM_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA); overlay.fill((0, 0, 0, 180))
@@ -471,10 +758,10 @@ class ExpressionTreeSimulation:
 
     def draw(self):
         self.screen.blit(self.bg_surface, (0, 0))
-        self.draw_tree(self.logic.root)
+        self.draw_tree()
         self.all_sprites.draw(self.screen)
         self.chassis.draw(self.screen); self.lcd.draw(self.screen)
         self.btn_gen_levels.draw(self.screen); self.btn_gen_expr.draw(self.screen)
-        self.btn_analyze.draw(self.screen); self.btn_clear.draw(self.screen)
+        self.btn_analyze.draw(self.screen); self.btn_clear.draw(self.screen); self.btn_share.draw(self.screen)
         if self.show_analysis_menu: self.draw_analysis_menu()
         elif self.manifest_data: self.draw_manifest()
\ No newline at end of file
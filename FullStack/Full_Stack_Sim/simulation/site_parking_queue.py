@@ -1,6 +1,7 @@
 import pygame
 import random
 import math
+from collections import deque
 from settings import *
 from core.sprites import CrateSprite
 from core.ui import HandheldChassis, LCDDisplay, RoundButton
@@ -18,9 +19,14 @@ class QueueManager:
     Handles enqueue/dequeue operations and tracks vehicle history.
     """
     def __init__(self, capacity=10):
-        self.items = []
+        self.items = deque()
         self.capacity = capacity
         self.history = {}
+        # Plate index: every enqueue (or cycle to the back) takes a ticket, so a
+        # vehicle's position is its ticket minus the ticket at the front of the lane.
+        self.plate_ticket = {}
+        self.head_ticket = 0
+        self.next_ticket = 0
 
     def _get_stats(self, plate):
         if plate not in self.history:
@@ -31,51 +37,75 @@ class QueueManager:
         """Adds a vehicle to the end of the queue."""
         if len(self.items) >= self.capacity:
             return {"type": "OVERFLOW", "message": "LANE FULL"}
-        for v in self.items:
-            if v.plate == plate:
-                return {"type": "DUPLICATE", "message": "ALREADY HERE"}
+        if plate in self.plate_ticket:
+            return {"type": "DUPLICATE", "message": "ALREADY HERE"}
         
         stats = self._get_stats(plate)
         stats['arrivals'] += 1
         new_vehicle = Vehicle(plate, stats['arrivals'], stats['departures'])
         self.items.append(new_vehicle)
+        self._issue_ticket(plate)
         return {
             "type": "ENQUEUE",
             "index": len(self.items) - 1,
             "data": new_vehicle
         }
 
-    def remove_vehicle(self, plate):
+    def _issue_ticket(self, plate):
+        self.plate_ticket[plate] = self.next_ticket
+        self.next_ticket += 1
+
+    def position_of(self, plate):
+        """Returns the vehicle's index from the front of the lane, or -1."""
+        ticket = self.plate_ticket.get(plate)
+        return -1 if ticket is None else ticket - self.head_ticket
+
+    def remove_vehicle(self, plate, compact_from=None):
         """
         Removes a specific vehicle.
         If the vehicle is not at the front, cycles preceding vehicles to the back.
+        When at least `compact_from` vehicles cycle, they are reported as a single
+        'ROTATE' event listing their plates instead of one 'CYCLE' event each.
         """
-        target_index = -1
-        for i, v in enumerate(self.items):
-            if v.plate == plate:
-                target_index = i
-                break
+        target_index = self.position_of(plate)
         if target_index == -1:
             return [{"type": "ERROR", "message": "NOT FOUND"}]
             
         events = []
+        compact = compact_from is not None and target_index >= compact_from
+        rotated_plates = []
         # Cycle items in front of target
         for _ in range(target_index):
-            cycling_vehicle = self.items.pop(0)
+            cycling_vehicle = self.items.popleft()
+            self.head_ticket += 1
             stats = self._get_stats(cycling_vehicle.plate)
             stats['departures'] += 1
             stats['arrivals'] += 1
             cycling_vehicle.arrival_count = stats['arrivals']
             cycling_vehicle.departure_count = stats['departures']
             self.items.append(cycling_vehicle)
+            self._issue_ticket(cycling_vehicle.plate)
+            if compact:
+                rotated_plates.append(cycling_vehicle.plate)
+                continue
             events.append({
                 "type": "CYCLE",
                 "data": cycling_vehicle,
                 "new_index": len(self.items) - 1
             })
             
+        if rotated_plates:
+            events.append({
+                "type": "ROTATE",
+                "count": len(rotated_plates),
+                "plates": rotated_plates,
+                "start_index": len(self.items) - len(rotated_plates)
+            })
+
         # Remove target
-        target_vehicle = self.items.pop(0)
+        target_vehicle = self.items.popleft()
+        self.head_ticket += 1
+        del self.plate_ticket[target_vehicle.plate]
         stats = self._get_stats(target_vehicle.plate)
         stats['departures'] += 1
         events.append({
@@ -137,6 +167,8 @@ class ParkingQueueSimulation:
         self.LOOP_EXIT_X = self.GATE_X + 40
         self.LOOP_DOWN_Y = 580
         self.LOOP_BACK_X = 20
+        self.ROTATE_CONVOY_MIN = 3  # Cycles batched into one convoy from this depth
+        self.ROTATE_SNAP_MIN = 8    # ...and snapped straight to the final layout from this depth
         
         self.bg_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
         self._generate_static_environment()
@@ -377,7 +409,7 @@ class ParkingQueueSimulation:
         plate = self.lcd.text.upper()
         if not plate: return
         
-        events = self.logic.remove_vehicle(plate)
+        events = self.logic.remove_vehicle(plate, compact_from=self.ROTATE_CONVOY_MIN)
         if events[0]['type'] == 'ERROR':
             self.lcd.update_status(f"ERR: {events[0]['message']}")
             return
@@ -436,21 +468,33 @@ class ParkingQueueSimulation:
             self._realign_queue(exclude_sprites=[sprite])
             
             final_slot_x = self.GATE_X - (event['new_index'] * self.SLOT_GAP)
-            
-            def step4_to_slot():
-                sprite.move_to((final_slot_x, self.LANE_Y), callback=lambda: [self._force_orientation(sprite, 0), self.process_next_event()])
-            def step3_up():
-                self._force_orientation(sprite, 90)
-                sprite.move_to((self.LOOP_BACK_X + 30, self.LANE_Y), callback=step4_to_slot)
-            def step2_left():
-                self._force_orientation(sprite, 180)
-                sprite.move_to((self.LOOP_BACK_X + 30, self.LOOP_DOWN_Y + 30), callback=step3_up)
-            def step1_down():
-                self._force_orientation(sprite, 270)
-                sprite.move_to((self.LOOP_EXIT_X, self.LOOP_DOWN_Y + 30), callback=step2_left)
-                
-            sprite.move_to((self.LOOP_EXIT_X, self.LANE_Y), callback=step1_down)
-            
+            self._drive_loop(sprite, final_slot_x, self.process_next_event)
+
+        elif event['type'] == 'ROTATE':
+            count = event['count']
+            convoy = self.visual_queue[:count]
+            self.visual_queue = self.visual_queue[count:] + convoy
+            slots = [self.GATE_X - (i * self.SLOT_GAP) for i in range(event['start_index'], event['start_index'] + count)]
+
+            if count >= self.ROTATE_SNAP_MIN:
+                for sprite, slot_x in zip(convoy, slots):
+                    sprite.pos_x, sprite.pos_y = slot_x, self.LANE_Y
+                    self._force_orientation(sprite, 0)
+                self._realign_queue(exclude_sprites=convoy)
+                self.process_next_event()
+                return
+
+            # Convoy: each truck leaves once the one ahead has cleared the gate;
+            # the lane closes up behind the last one, and the queue resumes when all are parked.
+            remaining = [count]
+            def on_parked():
+                remaining[0] -= 1
+                if remaining[0] == 0: self.process_next_event()
+            def launch(j):
+                on_exit = (lambda: launch(j + 1)) if j + 1 < count else (lambda: self._realign_queue(exclude_sprites=convoy))
+                self._drive_loop(convoy[j], slots[j], on_parked, on_exit)
+            launch(0)
+
         elif event['type'] == 'DEPART':
             sprite = self.visual_queue.pop(0)
             def cleanup():
@@ -459,6 +503,23 @@ class ParkingQueueSimulation:
                 self.process_next_event()
             sprite.move_to(self.EXIT_POINT, callback=cleanup)
 
+    def _drive_loop(self, sprite, final_slot_x, on_parked, on_exit=None):
+        """Sends a truck out past the gate, around the return loop and back into the lane."""
+        def step4_to_slot():
+            sprite.move_to((final_slot_x, self.LANE_Y), callback=lambda: [self._force_orientation(sprite, 0), on_parked()])
+        def step3_up():
+            self._force_orientation(sprite, 90)
+            sprite.move_to((self.LOOP_BACK_X + 30, self.LANE_Y), callback=step4_to_slot)
+        def step2_left():
+            self._force_orientation(sprite, 180)
+            sprite.move_to((self.LOOP_BACK_X + 30, self.LOOP_DOWN_Y + 30), callback=step3_up)
+        def step1_down():
+            if on_exit: on_exit()
+            self._force_orientation(sprite, 270)
+            sprite.move_to((self.LOOP_EXIT_X, self.LOOP_DOWN_Y + 30), callback=step2_left)
+
+        sprite.move_to((self.LOOP_EXIT_X, self.LANE_Y), callback=step1_down)
+
     def action_summary(self):
         self.show_summary = not self.show_summary
 
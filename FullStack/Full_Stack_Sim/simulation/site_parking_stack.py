@@ -20,6 +20,7 @@ class StackManager:
         self.items = []
         self.capacity = capacity
         self.history = {}
+        self.plate_index = {}  # plate -> position in items, kept in sync on every push/pop
 
     def _get_stats(self, plate):
         if plate not in self.history: self.history[plate] = {'arrivals': 0, 'departures': 0}
@@ -28,12 +29,13 @@ class StackManager:
     def push(self, plate):
         """Adds a vehicle to the top of the stack."""
         if len(self.items) >= self.capacity: return {"type": "OVERFLOW", "message": "BAY FULL"}
-        if any(v.plate == plate for v in self.items): return {"type": "DUPLICATE", "message": "ALREADY HERE"}
+        if plate in self.plate_index: return {"type": "DUPLICATE", "message": "ALREADY HERE"}
         
         stats = self._get_stats(plate)
         stats['arrivals'] += 1
         new_vehicle = Vehicle(plate, stats['arrivals'], stats['departures'])
         self.items.append(new_vehicle)
+        self.plate_index[plate] = len(self.items) - 1
         return {"type": "PUSH", "index": len(self.items) - 1, "data": new_vehicle}
 
     def remove_vehicle(self, plate):
@@ -41,10 +43,8 @@ class StackManager:
         Removes a specific vehicle.
         If the vehicle is not at the top, generates 'TEMP_POP' events for items above it.
         """
-        target_index = -1
-        for i, v in enumerate(self.items):
-            if v.plate == plate: target_index = i; break
-        if target_index == -1: return [{"type": "ERROR", "message": "NOT FOUND"}]
+        target_index = self.plate_index.get(plate)
+        if target_index is None: return [{"type": "ERROR", "message": "NOT FOUND"}]
         
         events = []
         current_top_index = len(self.items) - 1
@@ -53,6 +53,7 @@ class StackManager:
         # Pop items above target
         while len(self.items) > target_index + 1:
             v = self.items.pop()
+            del self.plate_index[v.plate]
             temp_holding.append(v)
             stats = self._get_stats(v.plate)
             stats['departures'] += 1
@@ -61,6 +62,7 @@ class StackManager:
             
         # Pop target
         target_vehicle = self.items.pop()
+        del self.plate_index[target_vehicle.plate]
         stats = self._get_stats(target_vehicle.plate)
         stats['departures'] += 1
         events.append({"type": "FINAL_POP", "data": target_vehicle, "index": target_index, "stats": stats})
@@ -68,6 +70,7 @@ class StackManager:
         # Push items back
         for v in reversed(temp_holding):
             self.items.append(v)
+            self.plate_index[v.plate] = len(self.items) - 1
             stats = self._get_stats(v.plate)
             stats['arrivals'] += 1
             events.append({"type": "RESTACK_PUSH", "data": v, "index": len(self.items) - 1})
@@ -110,89 +113,100 @@ class ParkingStackSimulation:
         self.event_queue = []
         self.is_animating = False
         self.show_summary = False
+        
+        self.bg_capacity = None
+        self.bg_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self._generate_static_environment()
 
-    def draw_pallet(self, x, y, boxes=2):
-        pygame.draw.rect(self.screen, (100, 80, 50), (x, y, 30, 20))
-        pygame.draw.line(self.screen, (60, 40, 20), (x, y+10), (x+30, y+10), 2)
+    def draw_pallet(self, surf, x, y, boxes=2):
+        pygame.draw.rect(surf, (100, 80, 50), (x, y, 30, 20))
+        pygame.draw.line(surf, (60, 40, 20), (x, y+10), (x+30, y+10), 2)
         for i in range(boxes):
             bx = x + 2 + (i*10); by = y - 10
-            pygame.draw.rect(self.screen, BOX_COLOR_1, (bx, by, 12, 12))
-            pygame.draw.rect(self.screen, (80, 60, 40), (bx, by, 12, 12), 1)
+            pygame.draw.rect(surf, BOX_COLOR_1, (bx, by, 12, 12))
+            pygame.draw.rect(surf, (80, 60, 40), (bx, by, 12, 12), 1)
 
-    def draw_vent(self, x, y):
-        pygame.draw.rect(self.screen, (40, 40, 45), (x, y, 20, 20))
+    def draw_vent(self, surf, x, y):
+        pygame.draw.rect(surf, (40, 40, 45), (x, y, 20, 20))
         for i in range(0, 20, 4):
-            pygame.draw.line(self.screen, (30, 30, 35), (x, y+i), (x+20, y+i), 1)
+            pygame.draw.line(surf, (30, 30, 35), (x, y+i), (x+20, y+i), 1)
 
-    def draw_environment(self):
-        self.screen.fill(ASPHALT_STACK_BASE)
+    def _generate_static_environment(self):
+        """Bakes the floor, walls, slot markings and props into bg_surface."""
+        surf = self.bg_surface
+        surf.fill(ASPHALT_STACK_BASE)
         for _ in range(5000):
             color = ASPHALT_STACK_NOISE
-            self.screen.set_at((random.randint(0, 749), random.randint(0, SCREEN_HEIGHT-1)), color)
+            surf.set_at((random.randint(0, 749), random.randint(0, SCREEN_HEIGHT-1)), color)
             
         # Walls
         wall_h = 80
         for x in range(0, 750, 10):
             color = WALL_CORRUGATED_DARK if (x // 10) % 2 == 0 else WALL_CORRUGATED_LIGHT
-            pygame.draw.rect(self.screen, color, (x, 0, 10, wall_h))
-        pygame.draw.rect(self.screen, (20,22,25), (0, wall_h, 750, 10))
+            pygame.draw.rect(surf, color, (x, 0, 10, wall_h))
+        pygame.draw.rect(surf, (20,22,25), (0, wall_h, 750, 10))
         
         # Control Room
         office_rect = pygame.Rect(325, 20, 150, 60)
-        pygame.draw.rect(self.screen, (30,35,40), office_rect, border_radius=5)
+        pygame.draw.rect(surf, (30,35,40), office_rect, border_radius=5)
         glow_surf = pygame.Surface((130, 40), pygame.SRCALPHA)
         glow_surf.fill(CONTROL_ROOM_GLOW)
-        self.screen.blit(glow_surf, (335, 30))
-        pygame.draw.rect(self.screen, (100, 110, 120), office_rect, 2, border_radius=5)
+        surf.blit(glow_surf, (335, 30))
+        pygame.draw.rect(surf, (100, 110, 120), office_rect, 2, border_radius=5)
         font = pygame.font.SysFont("Arial", 8)
-        self.screen.blit(font.render("CONTROL", True, (150, 160, 170)), (375, 22))
+        surf.blit(font.render("CONTROL", True, (150, 160, 170)), (375, 22))
         
         # Vents
         for x in [50, 150, 550, 650]:
-            pygame.draw.rect(self.screen, (20, 22, 25), (x, 30, 60, 30))
-            pygame.draw.rect(self.screen, (10, 12, 15), (x+5, 35, 50, 20))
+            pygame.draw.rect(surf, (20, 22, 25), (x, 30, 60, 30))
+            pygame.draw.rect(surf, (10, 12, 15), (x+5, 35, 50, 20))
             
         # Lane Markings
-        pygame.draw.line(self.screen, STRIPE_YELLOW, (250, 100), (250, SCREEN_HEIGHT), 2)
-        pygame.draw.line(self.screen, STRIPE_YELLOW, (500, 100), (500, SCREEN_HEIGHT), 2)
+        pygame.draw.line(surf, STRIPE_YELLOW, (250, 100), (250, SCREEN_HEIGHT), 2)
+        pygame.draw.line(surf, STRIPE_YELLOW, (500, 100), (500, SCREEN_HEIGHT), 2)
         
         slot_height = CRATE_WIDTH + PARKING_GAP
-        for i in range(10):
+        num_font = pygame.font.SysFont("Arial", 10, bold=True)
+        for i in range(self.logic.capacity):
             y = STACK_ZONE_BASE_Y - (i * slot_height)
             slot_rect = pygame.Rect(STACK_ZONE_X - 10, y - CRATE_WIDTH//2, CRATE_HEIGHT + 20, CRATE_WIDTH + 10)
             c_len = 15; col = PARKING_LINE_COLOR
-            pygame.draw.line(self.screen, col, slot_rect.topleft, (slot_rect.left + c_len, slot_rect.top), 2)
-            pygame.draw.line(self.screen, col, slot_rect.topleft, (slot_rect.left, slot_rect.top + c_len), 2)
-            pygame.draw.line(self.screen, col, (slot_rect.left, slot_rect.bottom - c_len), (slot_rect.left, slot_rect.bottom), 2)
-            pygame.draw.line(self.screen, col, (slot_rect.left - c_len//2, slot_rect.bottom), (slot_rect.left + c_len//2, slot_rect.bottom), 2)
-            pygame.draw.line(self.screen, col, slot_rect.topright, (slot_rect.right - c_len, slot_rect.top), 2)
-            pygame.draw.line(self.screen, col, slot_rect.topright, (slot_rect.right, slot_rect.top + c_len), 2)
-            pygame.draw.line(self.screen, col, (slot_rect.right, slot_rect.bottom - c_len), (slot_rect.right, slot_rect.bottom), 2)
-            pygame.draw.line(self.screen, col, (slot_rect.right - c_len//2, slot_rect.bottom), (slot_rect.right + c_len//2, slot_rect.bottom), 2)
-            
-            num_font = pygame.font.SysFont("Arial", 10, bold=True)
-            self.screen.blit(num_font.render(str(i+1), True, (150, 150, 160)), (slot_rect.right + 15, slot_rect.centery - 5))
+            pygame.draw.line(surf, col, slot_rect.topleft, (slot_rect.left + c_len, slot_rect.top), 2)
+            pygame.draw.line(surf, col, slot_rect.topleft, (slot_rect.left, slot_rect.top + c_len), 2)
+            pygame.draw.line(surf, col, (slot_rect.left, slot_rect.bottom - c_len), (slot_rect.left, slot_rect.bottom), 2)
+            pygame.draw.line(surf, col, (slot_rect.left - c_len//2, slot_rect.bottom), (slot_rect.left + c_len//2, slot_rect.bottom), 2)
+            pygame.draw.line(surf, col, slot_rect.topright, (slot_rect.right - c_len, slot_rect.top), 2)
+            pygame.draw.line(surf, col, slot_rect.topright, (slot_rect.right, slot_rect.top + c_len), 2)
+            pygame.draw.line(surf, col, (slot_rect.right, slot_rect.bottom - c_len), (slot_rect.right, slot_rect.bottom), 2)
+            pygame.draw.line(surf, col, (slot_rect.right - c_len//2, slot_rect.bottom), (slot_rect.right + c_len//2, slot_rect.bottom), 2)
+            surf.blit(num_font.render(str(i+1), True, (150, 150, 160)), (slot_rect.right + 15, slot_rect.centery - 5))
             
         # Holding Zone
-        for i in range(10):
+        for i in range(self.logic.capacity):
             y = HOLDING_ZONE_Y - (i * slot_height)
             slot_rect = pygame.Rect(HOLDING_ZONE_X - 10, y - CRATE_WIDTH//2, CRATE_HEIGHT + 20, CRATE_WIDTH + 10)
-            pygame.draw.rect(self.screen, STRIPE_YELLOW, slot_rect, 1)
+            pygame.draw.rect(surf, STRIPE_YELLOW, slot_rect, 1)
             
         # Labels
         font = pygame.font.SysFont("Impact", 18)
         text_surf = font.render("MAINTENANCE BAY", True, STENCIL_TEXT_COLOR)
         text_surf = pygame.transform.rotate(text_surf, 90)
-        self.screen.blit(text_surf, (STACK_ZONE_X - 40, 350))
+        surf.blit(text_surf, (STACK_ZONE_X - 40, 350))
         text_surf = font.render("TEMP PARKING", True, STENCIL_TEXT_COLOR)
         text_surf = pygame.transform.rotate(text_surf, 90)
-        self.screen.blit(text_surf, (HOLDING_ZONE_X + 130, 380))
+        surf.blit(text_surf, (HOLDING_ZONE_X + 130, 380))
         
         # Props
-        self.draw_pallet(20, 120, boxes=1); self.draw_pallet(60, 120, boxes=2)
-        self.draw_pallet(20, 160, boxes=2); self.draw_vent(100, 130)
-        self.draw_pallet(680, 120, boxes=2); self.draw_pallet(680, 160, boxes=1)
-        self.draw_vent(640, 130)
+        self.draw_pallet(surf, 20, 120, boxes=1); self.draw_pallet(surf, 60, 120, boxes=2)
+        self.draw_pallet(surf, 20, 160, boxes=2); self.draw_vent(surf, 100, 130)
+        self.draw_pallet(surf, 680, 120, boxes=2); self.draw_pallet(surf, 680, 160, boxes=1)
+        self.draw_vent(surf, 640, 130)
+        self.bg_capacity = self.logic.capacity
+
+    def draw_environment(self):
+        if self.bg_capacity != self.logic.capacity:
+            self._generate_static_environment()
+        self.screen.blit(self.bg_surface, (0, 0))
 
     def _force_park_orientation(self, sprite):
         sprite.angle = 0
@@ -1,9 +1,11 @@
 import pygame
 import math
 import random
+import heapq
 from settings import *
 from core.sprites import CrateSprite
 from core.ui import HandheldChassis, LCDDisplay, RoundButton, Button
+from core import traversal
 
 # ... [Keep BSTNode, BSTManager, PackageSprite, and DroneSprite classes unchanged] ...
 class BSTNode:
@@ -15,78 +17,145 @@ class BSTNode:
         self.target_x = 0; self.target_y = 0
         self.push_arm_state = 'idle'
         self.push_arm_timer = 0
+        self.height = 1
+        self.dirty = True
 
 class BSTManager:
-    def __init__(self):
+    def __init__(self, balanced=False):
         self.root = None
         self.nodes_count = 0
         self.max_allowed_depth = 5
         self.current_depth = 0
+        self.balanced = balanced
+        self.revision = 0
     def insert(self, value):
         if self.root is None:
             self.root = BSTNode(value)
             self.nodes_count += 1
             self.current_depth = 0
+            self.revision += 1
             return {"type": "ROOT", "node": self.root}
         current = self.root
         depth = 0
         path_nodes = []
         while True:
             path_nodes.append(current)
-            if depth >= self.max_allowed_depth:
+            # Balanced mode may overshoot by one level; the rebalance pulls it back or the insert is undone
+            if depth >= self.max_allowed_depth and not self.balanced:
                 return {"type": "ERROR", "message": "MAX DEPTH"}
             if value <= current.value:
                 if current.left is None:
                     current.left = BSTNode(value)
-                    self.nodes_count += 1
-                    self.current_depth = max(self.current_depth, depth + 1)
-                    return {
+                    receipt = {
                         "type": "INSERT", "node": current.left, "parent": current,
                         "direction": "LEFT", "path_nodes": path_nodes
                     }
+                    break
                 current = current.left
             else:
                 if current.right is None:
                     current.right = BSTNode(value)
-                    self.nodes_count += 1
-                    self.current_depth = max(self.current_depth, depth + 1)
-                    return {
+                    receipt = {
                         "type": "INSERT", "node": current.right, "parent": current,
                         "direction": "RIGHT", "path_nodes": path_nodes
                     }
+                    break
                 current = current.right
             depth += 1
+        if self.balanced:
+            receipt["rotations"] = self._rebalance(path_nodes)
+            if not receipt["rotations"] and depth + 1 > self.max_allowed_depth:
+                if receipt["direction"] == "LEFT": current.left = None
+                else: current.right = None
+                self._rebalance(path_nodes)
+                self.revision += 1
+                return {"type": "ERROR", "message": "MAX DEPTH"}
+            self.current_depth = self.root.height - 1
+        else:
+            self.current_depth = max(self.current_depth, depth + 1)
+        self.nodes_count += 1
+        self.revision += 1
+        return receipt
+
+    def bulk_load(self, values):
+        """
+        Rebuilds the hub as a height-balanced tree holding the current packages plus `values`.
+        The batch is sorted only if it isn't already, merged with the existing in-order nodes,
+        and median-split; existing nodes are reused so their packages stay attached.
+        """
+        batch = list(values)
+        if not batch: return {"type": "ERROR", "message": "EMPTY BATCH"}
+        if any(batch[i] > batch[i + 1] for i in range(len(batch) - 1)): batch.sort()
+        new_nodes = [BSTNode(v) for v in batch]
+        ordered = list(heapq.merge(self.in_order(), new_nodes, key=lambda n: n.value))
+        # A median-split tree of n nodes is n.bit_length() levels tall, whatever the values
+        if len(ordered).bit_length() - 1 > self.max_allowed_depth:
+            return {"type": "ERROR", "message": "MAX DEPTH"}
+        self.root = self._build_balanced(ordered, 0, len(ordered) - 1)
+        self.nodes_count = len(ordered)
+        self.current_depth = self.root.height - 1
+        self.revision += 1
+        return {"type": "BULK_LOAD", "nodes": new_nodes, "count": len(new_nodes)}
+    def _build_balanced(self, ordered, lo, hi):
+        if lo > hi: return None
+        # Plain median split, even across equal values: AVL rotations already move ties right,
+        # and the rebuilt tree has to be height-balanced for _rebalance's single-rotation fixups
+        mid = (lo + hi) // 2
+        node = ordered[mid]
+        node.left = self._build_balanced(ordered, lo, mid - 1)
+        node.right = self._build_balanced(ordered, mid + 1, hi)
+        self._fix_height(node)
+        return node
+
+    # AVL Balancing
+    def _height(self, node): return node.height if node else 0
+    def _fix_height(self, node): node.height = 1 + max(self._height(node.left), self._height(node.right))
+    def _rotate_right(self, pivot):
+        child = pivot.left
+        pivot.left = child.right; child.right = pivot
+        self._fix_height(pivot); self._fix_height(child)
+        return child
+    def _rotate_left(self, pivot):
+        child = pivot.right
+        pivot.right = child.left; child.left = pivot
+        self._fix_height(pivot); self._fix_height(child)
+        return child
+    def _rebalance(self, path_nodes):
+        """Walks the insert path bottom-up fixing heights; applies at most one single/double rotation."""
+        rotations = []
+        for i in range(len(path_nodes) - 1, -1, -1):
+            node = path_nodes[i]
+            self._fix_height(node)
+            balance = self._height(node.left) - self._height(node.right)
+            if abs(balance) <= 1: continue
+            if balance > 1:
+                if self._height(node.left.left) < self._height(node.left.right):
+                    rotations.append({"type": "ROTATE_LEFT", "pivot": node.left, "child": node.left.right})
+                    node.left = self._rotate_left(node.left)
+                rotations.append({"type": "ROTATE_RIGHT", "pivot": node, "child": node.left})
+                new_top = self._rotate_right(node)
+            else:
+                if self._height(node.right.right) < self._height(node.right.left):
+                    rotations.append({"type": "ROTATE_RIGHT", "pivot": node.right, "child": node.right.left})
+                    node.right = self._rotate_right(node.right)
+                rotations.append({"type": "ROTATE_LEFT", "pivot": node, "child": node.right})
+                new_top = self._rotate_left(node)
+            if i == 0: self.root = new_top
+            elif path_nodes[i - 1].left is node: path_nodes[i - 1].left = new_top
+            else: path_nodes[i - 1].right = new_top
+            break
+        return rotations
     def clear(self):
         self.root = None
         self.nodes_count = 0
         self.current_depth = 0
-    def in_order(self):
-        result = []
-        self._in_order_recursive(self.root, result)
-        return result
-    def _in_order_recursive(self, node, result):
-        if node:
-            self._in_order_recursive(node.left, result)
-            result.append(node)
-            self._in_order_recursive(node.right, result)
-    def pre_order(self):
-        result = []
-        self._pre_order_recursive(self.root, result)
-        return result
-    def _pre_order_recursive(self, node, result):
-        if node:
-            result.append(node)
-            self._pre_order_recursive(node.left, result)
-            self._pre_order_recursive(node.right, result)
-    def post_order(self):
-        result = []
-        self._post_order_recursive(self.root, result)
-        return result
-    def _post_order_recursive(self, node, result):
-        if node:
-            self._post_order_recursive(node.left, result)
-            self._post_order_recursive(node.right, result)
-            result.append(node)
+        self.revision += 1
+    def iter_in_order(self): return traversal.in_order(self.root)
+    def iter_pre_order(self): return traversal.pre_order(self.root)
+    def iter_post_order(self): return traversal.post_order(self.root)
+    def in_order(self): return list(self.iter_in_order())
+    def pre_order(self): return list(self.iter_pre_order())
+    def post_order(self): return list(self.iter_post_order())
 
 class PackageSprite(pygame.sprite.Sprite):
     def __init__(self, start_x, start_y, value, size=30):
@@ -101,6 +170,7 @@ class PackageSprite(pygame.sprite.Sprite):
         self.image = None
         self.current_size = 0
         self.attached_node = None
+        self.armed_nodes = []
         self.resize(size)
         self.rect = self.image.get_rect(center=(start_x, start_y))
     def resize(self, size):
@@ -129,6 +199,12 @@ class PackageSprite(pygame.sprite.Sprite):
         self.target_node = self.path_queue.pop(0)
         self.is_moving = True
     def update(self):
+        # The package owns the push arms it kicked, so settled nodes need no per-frame visit
+        if self.armed_nodes:
+            for node in self.armed_nodes:
+                node.push_arm_timer -= 1
+                if node.push_arm_timer == 0: node.push_arm_state = 'idle'
+            self.armed_nodes = [node for node in self.armed_nodes if node.push_arm_timer > 0]
         if self.attached_node:
             self.pos_x = self.attached_node.x
             self.pos_y = self.attached_node.y
@@ -149,6 +225,7 @@ class PackageSprite(pygame.sprite.Sprite):
                     else:
                         self.target_node.push_arm_state = 'right'
                     self.target_node.push_arm_timer = 15
+                    if self.target_node not in self.armed_nodes: self.armed_nodes.append(self.target_node)
                 self._start_next_leg()
             else:
                 self.is_moving = False
@@ -246,6 +323,10 @@ class RouterTreeSimulation:
         self.btn_insert = RoundButton(btn_cx, 280, 45, BTN_GREEN_BASE, BTN_GREEN_LIGHT, "INJECT", self.action_insert)
         self.btn_reset = RoundButton(btn_cx, 390, 45, BTN_RED_BASE, BTN_RED_LIGHT, "CLEAR", self.action_reset)
         self.btn_scan = RoundButton(btn_cx, 500, 45, BTN_BLUE_BASE, BTN_BLUE_LIGHT, "TRAVERSE", self.action_open_traversal_menu)
+        self.btn_balance = Button(btn_cx - 85, self.chassis.rect.bottom - 60, 170, 30, "AUTO-BALANCE: OFF", self.action_toggle_balance)
+        self.pending_rotations = []
+        self.bulk_settling = False
+        self.layout_key = None
         self.is_animating = False
         self.SIM_WIDTH = 750; self.TOP_MARGIN = 120; self.BOTTOM_MARGIN = 50
         self.ROOT_X = self.SIM_WIDTH // 2
@@ -256,7 +337,7 @@ class RouterTreeSimulation:
         self.menu_btn_in = Button(menu_cx - menu_btn_w//2, menu_start_y, menu_btn_w, menu_btn_h, "In-Order Traversal", lambda: self.action_traverse("IN"))
         self.menu_btn_pre = Button(menu_cx - menu_btn_w//2, menu_start_y + 50, menu_btn_w, menu_btn_h, "Pre-Order Traversal", lambda: self.action_traverse("PRE"))
         self.menu_btn_post = Button(menu_cx - menu_btn_w//2, menu_start_y + 100, menu_btn_w, menu_btn_h, "Post-Order Traversal", lambda: self.action_traverse("POST"))
-        self.is_traversing = False; self.traversal_path = []; self.traversal_index = 0
+        self.is_traversing = False; self.traversal_path = []; self.traversal_index = 0; self.traversal_steps = None
         self.highlighted_node = None; self.highlight_timer = 0
 
     def _generate_background(self):
@@ -342,27 +423,42 @@ class RouterTreeSimulation:
         # Deprecated
         pass
 
+    def _refresh_layout(self):
+        """Re-targets the tree only when its shape or the floor size changed since the last layout."""
+        key = (self.logic.revision, self.logic.current_depth, self.SIM_WIDTH, SCREEN_HEIGHT)
+        if key == self.layout_key: return
+        self.layout_key = key
+        self._recalculate_layout(self.logic.root, self.ROOT_X, self.TOP_MARGIN, 0, self.SIM_WIDTH / 2)
+
     def _recalculate_layout(self, node, x, y, level, width_spread):
-        if node is None: return
-        node.target_x = x; node.target_y = y
+        # Returns True if anything in the subtree has somewhere to move
+        if node is None: return False
+        if node.target_x != x or node.target_y != y:
+            node.target_x = x; node.target_y = y; node.dirty = True
         depth = self.logic.current_depth
         level_height = (SCREEN_HEIGHT - self.TOP_MARGIN - self.BOTTOM_MARGIN) / max(1, depth) if depth > 0 else 0
         next_spread = width_spread / 2
-        self._recalculate_layout(node.left, x - next_spread, y + level_height, level + 1, next_spread)
-        self._recalculate_layout(node.right, x + next_spread, y + level_height, level + 1, next_spread)
+        left_dirty = self._recalculate_layout(node.left, x - next_spread, y + level_height, level + 1, next_spread)
+        right_dirty = self._recalculate_layout(node.right, x + next_spread, y + level_height, level + 1, next_spread)
+        node.dirty = node.dirty or left_dirty or right_dirty
+        return node.dirty
 
     def _update_node_positions(self, node):
-        if node is None: return
+        # Settled subtrees are skipped outright; returns whether the subtree is still moving
+        if node is None or not node.dirty: return False
         dx = node.target_x - node.x; dy = node.target_y - node.y
-        if abs(dx) > 0.1 or abs(dy) > 0.1:
+        moving = abs(dx) > 0.1 or abs(dy) > 0.1
+        if moving:
             node.x += dx * 0.1; node.y += dy * 0.1
         else:
             node.x, node.y = node.target_x, node.target_y
-        if node.push_arm_timer > 0:
-            node.push_arm_timer -= 1
-            if node.push_arm_timer == 0:
-                node.push_arm_state = 'idle'
-        self._update_node_positions(node.left); self._update_node_positions(node.right)
+        left_dirty = self._update_node_positions(node.left); right_dirty = self._update_node_positions(node.right)
+        node.dirty = moving or left_dirty or right_dirty
+        return node.dirty
+
+    def interpolated_points(self):
+        # Nodes are custom-drawn from x/y; attached packages follow them through their rects
+        return self.logic.iter_in_order()
 
     def draw_conveyor_line(self, start, end):
         dist = math.hypot(end[0]-start[0], end[1]-start[1])
@@ -408,6 +504,7 @@ class RouterTreeSimulation:
     def action_insert(self):
         if self.is_animating or self.is_traversing: return
         text = self.lcd.text
+        if ',' in text: self.action_bulk_load(); return
         if not text.isdigit(): self.lcd.update_status("ERR: INTEGERS ONLY"); return
         val = int(text)
         if val > 999: self.lcd.update_status("ERR: MAX 999"); return
@@ -415,6 +512,7 @@ class RouterTreeSimulation:
         if receipt['type'] == 'ERROR': self.lcd.update_status(f"ERR: {receipt['message']}"); return
         self.lcd.update_status(f"ROUTING: {val}"); self.lcd.text = ""
         self.is_animating = True
+        self.pending_rotations = receipt.get('rotations', [])
         if receipt['type'] != 'ROOT':
             new_node = receipt['node']; parent = receipt['parent']
             new_node.x, new_node.y = parent.x, parent.y
@@ -426,14 +524,42 @@ class RouterTreeSimulation:
             path_nodes.extend(receipt['path_nodes']); path_nodes.append(receipt['node'])
         pkg.final_callback = self.on_animation_complete; pkg.add_path(path_nodes)
 
+    def action_bulk_load(self):
+        values = [part for part in self.lcd.text.split(',') if part]
+        if not values or not all(part.isdigit() for part in values): self.lcd.update_status("ERR: INTEGERS ONLY"); return
+        values = [int(part) for part in values]
+        if max(values) > 999: self.lcd.update_status("ERR: MAX 999"); return
+        receipt = self.logic.bulk_load(values)
+        if receipt['type'] == 'ERROR': self.lcd.update_status(f"ERR: {receipt['message']}"); return
+        self.lcd.update_status(f"BATCH: {receipt['count']} ROUTED"); self.lcd.text = ""
+        # Every new package drops from the hopper at once and rides its node into the balanced layout
+        for node in receipt['nodes']:
+            node.x, node.y = self.ROOT_X, self.TOP_MARGIN
+            pkg = PackageSprite(node.x, node.y, node.value, size=self.current_node_size * 0.7)
+            pkg.attached_node = node; self.packages_group.add(pkg)
+        self.pending_rotations = []
+        self.is_animating = True; self.bulk_settling = True
+
     def action_reset(self):
         if self.is_traversing: return
         self.logic.clear(); self.packages_group.empty()
         self.drone.move_to((-50, -50))
-        self.is_animating = False; self.lcd.update_status("SYSTEM FLUSHED")
+        self.is_animating = False; self.bulk_settling = False; self.lcd.update_status("SYSTEM FLUSHED")
 
     def on_animation_complete(self):
         self.is_animating = False; self.lcd.update_status("READY")
+        if self.pending_rotations:
+            # The nodes are already sliding into the rotated layout; flag the new subtree root
+            turns = "/".join("L" if r['type'] == "ROTATE_LEFT" else "R" for r in self.pending_rotations)
+            self.highlighted_node = self.pending_rotations[-1]['child']; self.highlight_timer = 45
+            self.lcd.update_status(f"REBALANCED: {turns}"); self.pending_rotations = []
+
+    def action_toggle_balance(self):
+        if self.is_animating or self.is_traversing: return
+        if self.logic.root: self.lcd.update_status("ERR: CLEAR FIRST"); return
+        self.logic.balanced = not self.logic.balanced
+        self.btn_balance.text = f"AUTO-BALANCE: {'ON' if self.logic.balanced else 'OFF'}"
+        self.lcd.update_status("AVL MODE ON" if self.logic.balanced else "AVL MODE OFF")
 
     def action_open_traversal_menu(self):
         if self.is_animating or self.is_traversing or not self.logic.root: return
@@ -441,20 +567,22 @@ class RouterTreeSimulation:
 
     def action_traverse(self, order_type):
         self.show_traversal_menu = False
-        path = []; title = ""
-        if order_type == "IN": path = self.logic.in_order(); title = "IN-ORDER SCAN MANIFEST"
-        elif order_type == "PRE": path = self.logic.pre_order(); title = "PRE-ORDER SCAN MANIFEST"
-        elif order_type == "POST": path = self.logic.post_order(); title = "POST-ORDER SCAN MANIFEST"
-        self.traversal_path = path
-        self.pending_report_data = {"title": title, "path": " ".join([str(node.value) for node in path])}
+        steps = None; title = ""
+        if order_type == "IN": steps = self.logic.iter_in_order(); title = "IN-ORDER SCAN MANIFEST"
+        elif order_type == "PRE": steps = self.logic.iter_pre_order(); title = "PRE-ORDER SCAN MANIFEST"
+        elif order_type == "POST": steps = self.logic.iter_post_order(); title = "POST-ORDER SCAN MANIFEST"
+        # Nodes are pulled from the walk one drone flight at a time; the path fills in as we go
+        self.traversal_steps = steps; self.traversal_path = []
+        self.pending_report_data = {"title": title}
         self.is_traversing = True; self.traversal_index = 0
         self.drone.pos_x, self.drone.pos_y = self.ROOT_X, 20
         self.lcd.update_status("SCANNING..."); self.process_next_traversal_step()
 
     def process_next_traversal_step(self):
-        if self.traversal_index >= len(self.traversal_path):
+        node_to_visit = next(self.traversal_steps, None)
+        if node_to_visit is None:
             self.on_traversal_complete(); return
-        node_to_visit = self.traversal_path[self.traversal_index]
+        self.traversal_path.append(node_to_visit)
         self.drone.move_to((node_to_visit.x, node_to_visit.y), callback=self.on_drone_arrival)
 
     def on_drone_arrival(self):
@@ -463,7 +591,8 @@ class RouterTreeSimulation:
         self.traversal_index += 1; self.process_next_traversal_step()
 
     def on_traversal_complete(self):
-        self.is_traversing = False; self.traversal_path = []; self.traversal_index = 0
+        self.pending_report_data["path"] = " ".join([str(node.value) for node in self.traversal_path])
+        self.is_traversing = False; self.traversal_path = []; self.traversal_index = 0; self.traversal_steps = None
         self.drone.move_to((-50, -50)); self.lcd.update_status("SCAN COMPLETE")
         self.traversal_result_data = self.pending_report_data; self.pending_report_data = None
 
@@ -478,7 +607,7 @@ class RouterTreeSimulation:
                 self.traversal_result_data = None; self.lcd.update_status("READY")
             return
         self.lcd.handle_event(event); self.btn_insert.handle_event(event)
-        self.btn_reset.handle_event(event); self.btn_scan.handle_event(event)
+        self.btn_reset.handle_event(event); self.btn_scan.handle_event(event); self.btn_balance.handle_event(event)
 
     def update(self):
         if self.show_traversal_menu: return
@@ -494,9 +623,9 @@ class RouterTreeSimulation:
         size_diff = target_node_size - self.current_node_size
         if abs(size_diff) > 0.1: self.current_node_size += size_diff * 0.1
         else: self.current_node_size = target_node_size
-        initial_spread = self.SIM_WIDTH / 2
-        self._recalculate_layout(self.logic.root, self.ROOT_X, self.TOP_MARGIN, 0, initial_spread)
-        self._update_node_positions(self.logic.root)
+        self._refresh_layout()
+        if not self._update_node_positions(self.logic.root) and self.bulk_settling:
+            self.bulk_settling = False; self.on_animation_complete()
         current_pkg_size = self.current_node_size * 0.8
         for pkg in self.packages_group:
             pkg.resize(current_pkg_size)
@@ -557,5 +686,6 @@ class RouterTreeSimulation:
         self.drone_group.draw(self.screen)
         self.chassis.draw(self.screen); self.lcd.draw(self.screen)
         self.btn_insert.draw(self.screen); self.btn_reset.draw(self.screen); self.btn_scan.draw(self.screen)
+        self.btn_balance.draw(self.screen)
         if self.show_traversal_menu: self.draw_traversal_menu()
         elif self.traversal_result_data: self.draw_traversal_result()
\ No newline at end of file
@@ -15,69 +15,64 @@ class SortingManager:
     def reset_to_original(self):
         if self.original_items:
             self.items = list(self.original_items)
-    def get_bubble_sort_steps(self):
-        steps = []
+    # Each algorithm is a lazy generator of animation steps, run on a private copy of the items;
+    # the get_* wrappers collect a whole run for callers that want a list
+    def iter_bubble_sort_steps(self):
         items = list(self.items)
         n = len(items)
         for i in range(n):
             swapped = False
             for j in range(0, n - i - 1):
-                steps.append({"type": "compare", "indices": (j, j + 1)})
+                yield {"type": "compare", "indices": (j, j + 1)}
                 if items[j] > items[j + 1]:
                     items[j], items[j + 1] = items[j + 1], items[j]
                     swapped = True
-                    steps.append({"type": "swap", "indices": (j, j + 1)})
-            steps.append({"type": "lock", "index": n - 1 - i})
+                    yield {"type": "swap", "indices": (j, j + 1)}
+            yield {"type": "lock", "index": n - 1 - i}
             if not swapped:
                 for k in range(0, n - i - 1):
-                    steps.append({"type": "lock", "index": k})
-                break
-        return steps
-    def get_selection_sort_steps(self):
-        steps = []
+                    yield {"type": "lock", "index": k}
+                return
+    def iter_selection_sort_steps(self):
         items = list(self.items)
         n = len(items)
         for i in range(n):
             min_idx = i
-            steps.append({"type": "highlight", "indices": [i]})
+            yield {"type": "highlight", "indices": [i]}
             for j in range(i + 1, n):
-                steps.append({"type": "compare", "indices": (min_idx, j)})
+                yield {"type": "compare", "indices": (min_idx, j)}
                 if items[j] < items[min_idx]:
                     min_idx = j
-                    steps.append({"type": "highlight", "indices": [min_idx]})
+                    yield {"type": "highlight", "indices": [min_idx]}
             if min_idx != i:
                 items[i], items[min_idx] = items[min_idx], items[i]
-                steps.append({"type": "swap", "indices": (i, min_idx)})
-            steps.append({"type": "lock", "index": i})
-        return steps
-    def get_insertion_sort_steps(self):
-        steps = []
+                yield {"type": "swap", "indices": (i, min_idx)}
+            yield {"type": "lock", "index": i}
+    def iter_insertion_sort_steps(self):
         items = list(self.items)
         n = len(items)
         if n > 0:
-            steps.append({"type": "lock", "index": 0})
+            yield {"type": "lock", "index": 0}
         for i in range(1, n):
             key = items[i]
             j = i - 1
-            steps.append({"type": "highlight", "indices": [i]})
+            yield {"type": "highlight", "indices": [i]}
             while j >= 0 and key < items[j]:
-                steps.append({"type": "compare", "indices": (j, i if j == i-1 else j+1)})
+                yield {"type": "compare", "indices": (j, i if j == i-1 else j+1)}
                 items[j + 1] = items[j]
-                steps.append({"type": "swap", "indices": (j, j + 1)})
+                yield {"type": "swap", "indices": (j, j + 1)}
                 j -= 1
             items[j + 1] = key
-            steps.append({"type": "lock", "index": i})
-        steps.append({"type": "lock_all"})
-        return steps
-    def get_merge_sort_steps(self):
-        steps = []
+            yield {"type": "lock", "index": i}
+        yield {"type": "lock_all"}
+    def iter_merge_sort_steps(self):
         items = list(self.items)
         def merge_sort_recursive(arr, start, end):
             if start < end:
                 mid = (start + end) // 2
-                merge_sort_recursive(arr, start, mid)
-                merge_sort_recursive(arr, mid + 1, end)
-                steps.append({"type": "highlight", "indices": list(range(start, end + 1))})
+                yield from merge_sort_recursive(arr, start, mid)
+                yield from merge_sort_recursive(arr, mid + 1, end)
+                yield {"type": "highlight", "indices": list(range(start, end + 1))}
                 left = arr[start:mid+1]
                 right = arr[mid+1:end+1]
                 i = j = 0; k = start
@@ -88,34 +83,36 @@ class SortingManager:
                 while i < len(left): arr[k] = left[i]; i += 1; k += 1
                 while j < len(right): arr[k] = right[j]; j += 1; k += 1
                 new_order_slice = arr[start:end+1]
-                steps.append({"type": "reorder", "indices": list(range(start, end + 1)), "values": new_order_slice})
-        merge_sort_recursive(items, 0, len(items) - 1)
-        steps.append({"type": "lock_all"})
-        return steps
-    def get_quick_sort_steps(self):
-        steps = []
+                yield {"type": "reorder", "indices": list(range(start, end + 1)), "values": new_order_slice}
+        yield from merge_sort_recursive(items, 0, len(items) - 1)
+        yield {"type": "lock_all"}
+    def iter_quick_sort_steps(self):
         items = list(self.items)
         def partition(arr, low, high):
             pivot = arr[high]; i = low - 1
-            steps.append({"type": "set_pivot", "index": high})
+            yield {"type": "set_pivot", "index": high}
             for j in range(low, high):
-                steps.append({"type": "compare", "indices": (j, high)})
+                yield {"type": "compare", "indices": (j, high)}
                 if arr[j] < pivot:
                     i += 1
                     arr[i], arr[j] = arr[j], arr[i]
-                    if i != j: steps.append({"type": "swap", "indices": (i, j)})
+                    if i != j: yield {"type": "swap", "indices": (i, j)}
             arr[i + 1], arr[high] = arr[high], arr[i + 1]
-            if (i + 1) != high: steps.append({"type": "swap", "indices": (i + 1, high)})
-            steps.append({"type": "lock", "index": i + 1})
+            if (i + 1) != high: yield {"type": "swap", "indices": (i + 1, high)}
+            yield {"type": "lock", "index": i + 1}
             return i + 1
         def quick_sort_recursive(arr, low, high):
             if low < high:
-                pi = partition(arr, low, high)
-                quick_sort_recursive(arr, low, pi - 1)
-                quick_sort_recursive(arr, pi + 1, high)
-        quick_sort_recursive(items, 0, len(items) - 1)
-        steps.append({"type": "lock_all"})
-        return steps
+                pi = yield from partition(arr, low, high)
+                yield from quick_sort_recursive(arr, low, pi - 1)
+                yield from quick_sort_recursive(arr, pi + 1, high)
+        yield from quick_sort_recursive(items, 0, len(items) - 1)
+        yield {"type": "lock_all"}
+    def get_bubble_sort_steps(self): return list(self.iter_bubble_sort_steps())
+    def get_selection_sort_steps(self): return list(self.iter_selection_sort_steps())
+    def get_insertion_sort_steps(self): return list(self.iter_insertion_sort_steps())
+    def get_merge_sort_steps(self): return list(self.iter_merge_sort_steps())
+    def get_quick_sort_steps(self): return list(self.iter_quick_sort_steps())
 
 class ContainerSprite(pygame.sprite.Sprite):
     def __init__(self, value, x, y, container_width, max_value):
@@ -255,7 +252,7 @@ class SortingSimulation:
         self.btn_speed_down = Button(btn_cx - speed_btn_w - 5, speed_btn_y, speed_btn_w, speed_btn_h, "Speed -", self.decrease_speed)
         self.btn_speed_up = Button(btn_cx + 5, speed_btn_y, speed_btn_w, speed_btn_h, "Speed +", self.increase_speed)
         self.is_sorting = False
-        self.sort_steps = []
+        self.sort_steps = None
         self.visual_containers = []
         self.slot_positions = []
         self.gantry_crane = GantryCraneSprite(y_pos=180, rail_width=self.SIM_WIDTH)
@@ -422,12 +419,13 @@ class SortingSimulation:
         self.is_sorting = True
         self.lcd.update_status(f"SORTING: {sort_type.upper()}")
         st_map = {
-            "bubble": self.logic.get_bubble_sort_steps,
-            "selection": self.logic.get_selection_sort_steps,
-            "insertion": self.logic.get_insertion_sort_steps,
-            "merge": self.logic.get_merge_sort_steps,
-            "quick": self.logic.get_quick_sort_steps
+            "bubble": self.logic.iter_bubble_sort_steps,
+            "selection": self.logic.iter_selection_sort_steps,
+            "insertion": self.logic.iter_insertion_sort_steps,
+            "merge": self.logic.iter_merge_sort_steps,
+            "quick": self.logic.iter_quick_sort_steps
         }
+        # Steps are produced as the crane consumes them, so the first move starts at once
         self.sort_steps = st_map[sort_type]()
         self.process_next_step()
     def action_reset(self):
@@ -435,7 +433,7 @@ class SortingSimulation:
             sprite.is_moving = False
             sprite.on_finish_callback = None
         self.is_sorting = False
-        self.sort_steps.clear()
+        self.sort_steps = None
         self.show_sort_menu = False
         self.lcd.update_status("SYSTEM RESET")
         self.action_load_containers()
@@ -460,12 +458,12 @@ class SortingSimulation:
         self.visual_containers[start : end + 1] = reordered_visual_slice
         self.process_next_step()
     def process_next_step(self):
-        if not self.sort_steps or not self.is_sorting:
-            self.is_sorting = False
+        step = next(self.sort_steps, None) if self.is_sorting and self.sort_steps else None
+        if step is None:
+            self.is_sorting = False; self.sort_steps = None
             self.lcd.update_status("SORT COMPLETE")
             self.reset_container_states()
             return
-        step = self.sort_steps.pop(0)
         self.reset_container_states()
         step_type = step.get("type")
         if step_type == "compare":